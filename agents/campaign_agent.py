@@ -1,35 +1,16 @@
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 from core.state import AgentState
-from core.llm import get_llm
+from core.llm import get_llm, cache_prefix
+from core.serialize import to_json, FastJsonOutputParser
 
 class CampaignArchitectAgent:
     def __init__(self):
         self.temperature = 0.4
 
-    def create_brief(self, state: AgentState) -> dict:
-        """
-        Creates a structured campaign brief.
-        """
-        llm = get_llm(temperature=self.temperature)
-        strategy = state.get("strategy_framework", "")
-        personas = state.get("personas", [])
-        segments = state.get("segments", [])
-        company_name = state.get("company_name", "the Client")
-
-        prompt = ChatPromptTemplate.from_template(
-            """
-            You are a Campaign Manager for {company_name}.
-            Create a Campaign Brief based on the strategy.
-
-            **Strategy:**
-            {strategy}
-
-            **Available Segments:**
-            {segments}
-
-            **Personas:**
-            {personas}
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """
+            You are a Campaign Manager.
+            Create a Campaign Brief based on the strategy provided for the company.
 
             **Task:**
             1. Analyze the research and segments to select **EXACTLY ONE** Primary Target Segment.
@@ -39,7 +20,7 @@ class CampaignArchitectAgent:
             **Output:**
             Create a JSON object representing the Brief. You MUST include 'primary_target_segment' and 'segment_rationale'.
             {{
-                "company_name": "{company_name}",
+                "company_name": "The company name",
                 "campaign_name": "Strategic Campaign Name",
                 "primary_target_segment": "Name of the ONE selected segment",
                 "segment_rationale": "Detailed strategic justification for why THIS segment was chosen over others.",
@@ -50,24 +31,46 @@ class CampaignArchitectAgent:
                 "key_messages": ["Message 1", "Message 2", "Message 3"],
                 "funnel_stage_focus": "Awareness|Evaluation|Decision"
             }}
-            """
-        )
+            """),
+            ("human", """
+            **Company:** {company_name}
 
-        chain = prompt | llm | JsonOutputParser()
+            **Strategy:**
+            {strategy}
+
+            **Available Segments:**
+            {segments}
+
+            **Personas:**
+            {personas}
+            """),
+        ])
+        self.parser = FastJsonOutputParser()
+
+    def create_brief(self, state: AgentState) -> dict:
+        """
+        Creates a structured campaign brief.
+        """
+        llm = get_llm(temperature=self.temperature)
+        strategy = state.get("strategy_framework", "")
+        personas = state.get("personas", [])
+        segments = state.get("segments", [])
+        company_name = state.get("company_name", "the Client")
+
+        chain = self.prompt | cache_prefix | llm | self.parser
         try:
             result = chain.invoke({
                 "company_name": company_name,
                 "strategy": strategy,
-                "personas": str(personas),
-                "segments": str(segments)
+                "personas": to_json(personas),
+                "segments": to_json(segments)
             })
             return {"campaign_brief": result}
         except Exception as e:
-            errors = state.get("errors", [])
-            errors.append({
+            errors = [{
                 "agent_name": "CampaignArchitectAgent",
                 "error_type": "api_error",
                 "message": str(e),
                 "recoverable": True
-            })
+            }]
             return {"campaign_brief": {"error": str(e)}, "errors": errors}
@@ -0,0 +1,118 @@
+from langchain_core.prompts import ChatPromptTemplate
+from core.state import AgentState
+from core.llm import get_llm, cache_prefix
+from core.serialize import to_json, FastJsonOutputParser
+from agents.content_agent import DEFAULT_ASSET_TYPE, _brand_block, _build_asset, _refinement_block
+
+
+class CampaignWriterAgent:
+    """
+    Writes the assets, their promo copy and the review in a single LLM call, instead
+    of the content -> promotion -> review chain that re-sends the strategy and brief
+    three times per refinement loop. Suited to small manifests: every asset has to
+    fit in one response.
+    """
+
+    def __init__(self):
+        self.temperature = 0.4
+
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """
+            You are an Expert Content Creator, Social Media Marketing Manager and Strategic Reviewer.
+            For EACH numbered asset request in the described campaign:
+            1. Write the asset: voice and tone MUST match the Strategic Context, reinforce the core
+               campaign theme, robust header structure, clear takeaways, approx 800-1000 words, Markdown.
+            2. Write its promo copy in Markdown: a LinkedIn post (hook-driven, 3 hashtags), a 2-part
+               nurture email (Subject Line + Body), ad copy (LinkedIn, Google Search, Meta) and a tweet.
+            Then review the whole campaign: does it cover multiple buying committee members and funnel
+            stages, solve each asset's job to be done, and match the Strategy Framework?
+
+            **Output Format (JSON):**
+            "index" is the request number; "score" is a 0-100 compliance score; "refinement_instructions"
+            are specific fixes for the assets if the score is below 90, otherwise "Perfect as is".
+            {{
+                "assets": [
+                    {{"index": 0, "content": "# Asset in Markdown...", "promo": "Promo copy in Markdown..."}}
+                ],
+                "review": {{
+                    "score": 0,
+                    "markdown_report": "Audit in Markdown with Strengths and Gaps",
+                    "refinement_instructions": "..."
+                }}
+            }}
+            """),
+            # Same prefix as the content prompts, so it is cached across refinement loops
+            ("human", """
+            **STRATEGIC CONTEXT (STRICTLY ADHERE TO THIS):**
+            {strategy}
+
+            **Campaign Brief:**
+            {brief}
+            {brand_block}
+            """),
+            ("human", """
+            **Asset Requests for {company_name}:**
+            {requests_block}
+
+            {refinement_block}
+            """),
+        ])
+        self.parser = FastJsonOutputParser()
+
+    def write_campaign(self, state: AgentState) -> dict:
+        """
+        Generates assets with promo copy plus the review for the whole manifest.
+        Raises ValueError if the response leaves out an asset or the review, so the
+        caller can fall back to the three-step path.
+        """
+        manifest = state.get("content_manifest", [])
+        llm = get_llm(temperature=self.temperature)
+
+        requests_block = "\n".join(
+            f"{n}. **{r.get('asset_type') or r.get('recommended_asset_type') or DEFAULT_ASSET_TYPE}** "
+            f"for **{r.get('persona_role', 'Buyer')}** | Job to be Done: {r.get('jtbd', '')} | "
+            f"Key Question to Answer: {r.get('burning_question', '')}"
+            for n, r in enumerate(manifest)
+        )
+        print(f"Writing {len(manifest)} assets, promo and review in one call...")
+
+        chain = self.prompt | cache_prefix | llm | self.parser
+        result = chain.invoke({
+            "company_name": state.get("company_name", "the Client"),
+            "strategy": state.get("strategy_framework", ""),
+            "brief": to_json(state.get("campaign_brief", {})),
+            "requests_block": requests_block,
+            "refinement_block": _refinement_block(state.get("refinement_instructions", "")),
+            "brand_block": _brand_block(state.get("brand_voice", ""), state.get("brand_tone", ""))
+        }) or {}
+
+        by_index = {}
+        for entry in result.get("assets", []):
+            if isinstance(entry, dict) and entry.get("content"):
+                try:
+                    by_index[int(entry.get("index"))] = entry
+                except (TypeError, ValueError):
+                    continue
+        review = result.get("review")
+        if len(by_index) < len(manifest) or not isinstance(review, dict):
+            raise ValueError(
+                f"Fused response returned {len(by_index)}/{len(manifest)} assets"
+                + ("" if isinstance(review, dict) else " and no review")
+            )
+
+        assets = []
+        for n, item in enumerate(manifest):
+            asset = _build_asset(item, by_index[n]["content"])
+            if by_index[n].get("promo"):
+                asset["promotional_materials"] = by_index[n]["promo"]
+            assets.append(asset)
+
+        return {
+            "generated_assets": assets,
+            "reviewer_feedback": review.get("markdown_report", ""),
+            "reviewer_score": review.get("score", 0),
+            "refinement_instructions": review.get("refinement_instructions", "")
+        }
+
+if __name__ == "__main__":
+    pass
@@ -1,19 +1,74 @@
+import asyncio
 import os
+import threading
+import time
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from core.state import AgentState
-from core.llm import get_llm
+from core.runtime import run as run_async
+from core.llm import get_llm, cache_prefix
+
+# Tavily results keyed by normalized company name: {key: (expires_at, intel)}
+_TAVILY_TTL = float(os.getenv("TAVILY_CACHE_TTL", "86400"))
+_TAVILY_MAX_ENTRIES = 256
+_tavily_cache = {}
+_tavily_lock = threading.Lock()
+
 
 class CompetitorAgent:
     def __init__(self):
         self.temperature = 0.1
 
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """
+            You are a Competitive Intelligence Analyst.
+            Based on the deep research provided, conduct a competitive landscape analysis.
+
+            **Task:**
+            1. Identify 3-5 likely competitors based on the company's value_prop.
+            2. Analyze the "Positioning Gap" - where does this company win where others fail?
+            3. Create a "Battlecard" summary for the top competitor.
+
+            Produce a Markdown report.
+            """),
+            ("human", """
+            **Research Context:**
+            {research}
+            {tavily_intel}
+            """),
+        ])
+        self.parser = StrOutputParser()
+
     def _fetch_tavily_intel(self, company_name: str) -> str:
-        """Fetch real-time competitor intelligence via Tavily search."""
+        """Fetch real-time competitor intelligence via Tavily search, cached per company for TAVILY_CACHE_TTL seconds."""
+        key = f"tavily::{company_name.lower().strip()}"
+        now = time.monotonic()
+        with _tavily_lock:
+            hit = _tavily_cache.get(key)
+            if hit and hit[0] > now:
+                print("--- Tavily cache hit ---")
+                return hit[1]
+
+        intel = self._search_tavily(company_name)
+        if intel is None:
+            return ""
+
+        with _tavily_lock:
+            if len(_tavily_cache) >= _TAVILY_MAX_ENTRIES:
+                # Drop expired entries first, then the oldest if still full
+                for k in [k for k, (exp, _) in _tavily_cache.items() if exp <= now]:
+                    del _tavily_cache[k]
+                if len(_tavily_cache) >= _TAVILY_MAX_ENTRIES:
+                    del _tavily_cache[next(iter(_tavily_cache))]
+            _tavily_cache[key] = (now + _TAVILY_TTL, intel)
+        return intel
+
+    def _search_tavily(self, company_name: str):
+        """Runs the Tavily search. Returns None when it could not run, so the miss is not cached."""
         tavily_key = os.getenv("TAVILY_API_KEY")
         if not tavily_key:
             print("--- Tavily API key not set, using LLM-only competitor analysis ---")
-            return ""
+            return None
         try:
             from tavily import TavilyClient
             tavily = TavilyClient(api_key=tavily_key)
@@ -30,49 +85,36 @@ class CompetitorAgent:
             return ""
         except Exception as e:
             print(f"--- Tavily search failed, falling back to LLM-only: {e} ---")
-            return ""
+            return None
 
     def analyze(self, state: AgentState) -> dict:
         """
         Performs competitive analysis based on the research.
         """
-        research = state.get("deep_research", "")
+        return run_async(self.aanalyze(state))
+
+    async def aanalyze(self, state: AgentState) -> dict:
+        """
+        Async version of analyze, so the graph can run it alongside segmentation.
+        """
+        research = state.get("deep_research_compact") or state.get("deep_research", "")
         company_name = state.get("company_name", "")
         llm = get_llm(temperature=self.temperature)
 
-        tavily_intel = self._fetch_tavily_intel(company_name)
-
-        prompt = ChatPromptTemplate.from_template(
-            """
-            You are a Competitive Intelligence Analyst.
-            Based on the deep research provided, conduct a competitive landscape analysis.
-
-            **Research Context:**
-            {research}
-            {tavily_intel}
-
-            **Task:**
-            1. Identify 3-5 likely competitors based on the company's value_prop.
-            2. Analyze the "Positioning Gap" - where does this company win where others fail?
-            3. Create a "Battlecard" summary for the top competitor.
-
-            Produce a Markdown report.
-            """
-        )
+        tavily_intel = await asyncio.to_thread(self._fetch_tavily_intel, company_name)
 
-        chain = prompt | llm | StrOutputParser()
+        chain = self.prompt | cache_prefix | llm | self.parser
 
         try:
-            result = chain.invoke({"research": research, "tavily_intel": tavily_intel})
+            result = await chain.ainvoke({"research": research, "tavily_intel": tavily_intel})
             return {"competitor_analysis": result}
         except Exception as e:
-            errors = state.get("errors", [])
-            errors.append({
+            errors = [{
                 "agent_name": "CompetitorAgent",
                 "error_type": "api_error",
                 "message": str(e),
                 "recoverable": True
-            })
+            }]
             return {
                 "competitor_analysis": f"Error in CompetitorAgent: {str(e)}",
                 "errors": errors
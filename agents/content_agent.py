@@ -1,32 +1,22 @@
-import time
-import concurrent.futures
+import asyncio
+import hashlib
+import os
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from core.state import AgentState
-from core.llm import get_llm
+from core.runtime import run as run_async
+from core.llm import get_llm, cache_prefix, RateLimiter
+from core.batch import BatchProcessor, batch_supported
+from core.serialize import to_json, FastJsonOutputParser
+from agents.promo_agent import PROMO_PREVIEW_CHARS
 
+DEFAULT_ASSET_TYPE = "Blog Post"
 
-class ContentCreatorAgent:
-    def __init__(self):
-        self.temperature = 0.4
-
-    def generate_asset(self, asset_request: dict, campaign_brief: dict, strategy_framework: str = "", company_name: str = "Company", refinement_instructions: str = "", brand_voice: str = "", brand_tone: str = "") -> dict:
-        """
-        Generates a single content asset based on the request (row from manifest).
-        """
-        time.sleep(5)
-        llm = get_llm(temperature=self.temperature)
-
-        asset_type = asset_request.get("asset_type", asset_request.get("recommended_asset_type", "Blog Post"))
-        jtbd = asset_request.get("jtbd", "")
-        question = asset_request.get("burning_question", "")
-        persona = asset_request.get("persona_role", "Buyer")
-
-        print(f"Generating {asset_type} for {persona}...")
 
-        refinement_block = ""
-        if refinement_instructions:
-            refinement_block = f"""
+def _refinement_block(refinement_instructions: str) -> str:
+    if not refinement_instructions:
+        return ""
+    return f"""
             **REFINEMENT REQUEST:**
             The previous version of this asset was reviewed and requires the following improvements:
             {refinement_instructions}
@@ -34,103 +24,346 @@ class ContentCreatorAgent:
             Please ensure this new version addresses all the gaps mentioned above while maintaining the original strategic alignment.
             """
 
-        brand_block = ""
-        if brand_voice or brand_tone:
-            brand_block = f"""
+
+def _brand_block(brand_voice: str, brand_tone: str) -> str:
+    if not (brand_voice or brand_tone):
+        return ""
+    return f"""
             **BRAND VOICE & TONE:**
             - Voice: {brand_voice or 'Not specified'}
             - Tone: {brand_tone or 'Not specified'}
             All content MUST reflect this voice and tone consistently.
             """
 
-        prompt = ChatPromptTemplate.from_template(
-            """
+
+def _build_asset(asset_request: dict, content: str) -> dict:
+    asset_type = asset_request.get("asset_type", asset_request.get("recommended_asset_type", DEFAULT_ASSET_TYPE))
+    persona = asset_request.get("persona_role", "Buyer")
+    question = asset_request.get("burning_question", "")
+    return {
+        "type": asset_type,
+        "title": f"{asset_type} for {persona}: {question}",
+        "content": content,
+        "persona": persona,
+        # Content digest rather than hash(): builtin str hashing is salted per process
+        "id": asset_request.get("id") or hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+    }
+
+
+def _asset_inputs(asset_request: dict, campaign_brief: dict, strategy_framework: str, refinement_instructions: str, brand_voice: str, brand_tone: str) -> dict:
+    """Prompt variables for generating one asset from a manifest row."""
+    return {
+        "strategy": strategy_framework,
+        "brief": to_json(campaign_brief),
+        "asset_type": asset_request.get("asset_type", asset_request.get("recommended_asset_type", DEFAULT_ASSET_TYPE)),
+        "persona": asset_request.get("persona_role", "Buyer"),
+        "jtbd": asset_request.get("jtbd", ""),
+        "question": asset_request.get("burning_question", ""),
+        "refinement_block": _refinement_block(refinement_instructions),
+        "brand_block": _brand_block(brand_voice, brand_tone)
+    }
+
+
+def _dedup_key(asset_request: dict) -> str:
+    """Canonical identity of a manifest row: rows sharing it would produce the same asset."""
+    fields = {
+        k: str(asset_request.get(k, "")).strip().lower()
+        for k in ("asset_type", "persona_role", "burning_question")
+    }
+    return hashlib.sha256(to_json(fields).encode("utf-8")).hexdigest()
+
+
+class ContentCreatorAgent:
+    def __init__(self):
+        self.temperature = 0.4
+        self.rate_limiter = RateLimiter()
+
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """
             You are an Expert Content Creator.
-            Create a comprehensive {asset_type} for the described campaign.
+            Create a comprehensive content asset for the described campaign.
 
+            **Requirements:**
+            - **Voice & Tone:** MUST match the Positioning and Messaging Pillars defined in the Strategic Context.
+            - **Theme:** Reinforce the core campaign theme.
+            - **Structure:** Robust header structure, clear takeaways.
+            - **Length:** Detailed (approx 800-1000 words).
+
+            Output the content in Markdown format.
+            """),
+            # Shared by every asset in the run (and by refinement passes), so cached as a prefix
+            ("human", """
             **STRATEGIC CONTEXT (STRICTLY ADHERE TO THIS):**
             {strategy}
 
             **Campaign Brief:**
             {brief}
             {brand_block}
-
+            """),
+            ("human", """
+            **Asset Type:** {asset_type}
             **Target Persona:** {persona}
             **Job to be Done:** {jtbd}
             **Key Question to Answer:** {question}
 
             {refinement_block}
+            """),
+        ])
 
-            **Requirements:**
+        self.group_prompt = ChatPromptTemplate.from_messages([
+            ("system", """
+            You are an Expert Content Creator.
+            Create a comprehensive content asset for EACH of the numbered asset requests in the described campaign.
+
+            **Requirements (apply to every asset):**
             - **Voice & Tone:** MUST match the Positioning and Messaging Pillars defined in the Strategic Context.
             - **Theme:** Reinforce the core campaign theme.
             - **Structure:** Robust header structure, clear takeaways.
             - **Length:** Detailed (approx 800-1000 words).
 
-            Output the content in Markdown format.
-            """
+            **Output Format (JSON):**
+            Each "content" value is the full asset in Markdown; "index" is the request number.
+            {{
+                "assets": [
+                    {{"index": 0, "content": "# Asset in Markdown..."}}
+                ]
+            }}
+            """),
+            ("human", """
+            **STRATEGIC CONTEXT (STRICTLY ADHERE TO THIS):**
+            {strategy}
+
+            **Campaign Brief:**
+            {brief}
+            {brand_block}
+            """),
+            ("human", """
+            **Asset Requests:**
+            {requests_block}
+
+            {refinement_block}
+            """),
+        ])
+        self.parser = StrOutputParser()
+        self.group_parser = FastJsonOutputParser()
+
+    def generate_asset(self, asset_request: dict, campaign_brief: dict, strategy_framework: str = "", company_name: str = "Company", refinement_instructions: str = "", brand_voice: str = "", brand_tone: str = "") -> dict:
+        """
+        Generates a single content asset based on the request (row from manifest).
+        """
+        return run_async(self.agenerate_asset(
+            asset_request, campaign_brief, strategy_framework, company_name,
+            refinement_instructions, brand_voice, brand_tone
+        ))
+
+    async def agenerate_asset(self, asset_request: dict, campaign_brief: dict, strategy_framework: str = "", company_name: str = "Company", refinement_instructions: str = "", brand_voice: str = "", brand_tone: str = "", on_preview=None) -> dict:
+        """
+        Async version of generate_asset, used for concurrent batch generation.
+        Streams the response; `on_preview` is called once with the first
+        PROMO_PREVIEW_CHARS characters so promo copy can start before the asset finishes.
+        """
+        await self.rate_limiter.aacquire()
+        llm = get_llm(temperature=self.temperature)
+
+        inputs = _asset_inputs(asset_request, campaign_brief, strategy_framework, refinement_instructions, brand_voice, brand_tone)
+        print(f"Generating {inputs['asset_type']} for {inputs['persona']}...")
+
+        chain = self.prompt | cache_prefix | llm | self.parser
+        chunks = []
+        streamed = 0
+        async for chunk in chain.astream(inputs):
+            chunks.append(chunk)
+            if on_preview and streamed < PROMO_PREVIEW_CHARS <= streamed + len(chunk):
+                on_preview("".join(chunks)[:PROMO_PREVIEW_CHARS])
+            streamed += len(chunk)
+        content = "".join(chunks)
+
+        return _build_asset(asset_request, content)
+
+    async def agenerate_group(self, asset_requests: list, campaign_brief: dict, strategy_framework: str = "", company_name: str = "Company", refinement_instructions: str = "", brand_voice: str = "", brand_tone: str = "") -> list:
+        """
+        Generates several assets in one LLM call that shares the strategy/brief prefix.
+        Returns a list aligned with asset_requests; entries the model did not return are None.
+        """
+        await self.rate_limiter.aacquire()
+        llm = get_llm(temperature=self.temperature)
+
+        requests_block = "\n".join(
+            f"{n}. **{r.get('asset_type', 'Blog Post')}** for **{r.get('persona_role', 'Buyer')}** | "
+            f"Job to be Done: {r.get('jtbd', '')} | Key Question to Answer: {r.get('burning_question', '')}"
+            for n, r in enumerate(asset_requests)
         )
+        print(f"Generating {len(asset_requests)} assets in one batch...")
 
-        chain = prompt | llm | StrOutputParser()
-        content = chain.invoke({
-            "asset_type": asset_type,
+        chain = self.group_prompt | cache_prefix | llm | self.group_parser
+        result = await chain.ainvoke({
             "strategy": strategy_framework,
-            "brief": str(campaign_brief),
-            "persona": persona,
-            "jtbd": jtbd,
-            "question": question,
-            "refinement_block": refinement_block,
-            "brand_block": brand_block
+            "brief": to_json(campaign_brief),
+            "requests_block": requests_block,
+            "refinement_block": _refinement_block(refinement_instructions),
+            "brand_block": _brand_block(brand_voice, brand_tone)
         })
 
-        return {
-            "type": asset_type,
-            "title": f"{asset_type} for {persona}: {question}",
-            "content": content,
-            "persona": persona,
-            "id": asset_request.get("id", str(hash(content)))
+        by_index = {}
+        for entry in (result or {}).get("assets", []):
+            if isinstance(entry, dict) and entry.get("content"):
+                try:
+                    by_index[int(entry.get("index"))] = entry["content"]
+                except (TypeError, ValueError):
+                    continue
+        return [
+            _build_asset(r, by_index[n]) if n in by_index else None
+            for n, r in enumerate(asset_requests)
+        ]
+
+    def batch_generate(self, state: AgentState, promoter=None) -> dict:
+        """
+        Generates assets concurrently on a single event loop.
+        If `promoter` (async callable taking a partial asset dict, returning promo
+        markdown) is given, promo copy is generated while assets are still streaming.
+        """
+        errors = []
+        # Normalized copies, so the caller's manifest is left untouched
+        manifest = [
+            {**item, "asset_type": item.get("asset_type") or item.get("recommended_asset_type") or DEFAULT_ASSET_TYPE}
+            for item in state.get("content_manifest", [])
+        ]
+
+        # Generate each distinct (asset_type, persona_role, burning_question) once
+        keys = [_dedup_key(item) for item in manifest]
+        first_index = {}
+        unique = []
+        for key, item in zip(keys, manifest):
+            if key not in first_index:
+                first_index[key] = len(unique)
+                unique.append(item)
+        if len(unique) < len(manifest):
+            print(f"Skipping {len(manifest) - len(unique)} duplicate manifest rows")
+
+        if state.get("batch_mode") == "async" and batch_supported():
+            unique_results = self._batch_api(unique, state)
+        else:
+            unique_results = run_async(self._abatch(unique, state, promoter))
+
+        results = []
+        claimed = set()
+        for n, (key, item) in enumerate(zip(keys, manifest)):
+            u = first_index[key]
+            result = unique_results[u]
+            if u in claimed and isinstance(result, dict):
+                # Duplicate row: reuse the generated asset under its own id
+                result = dict(result, id=item.get("id", f"{result['id']}-{n}"))
+            claimed.add(u)
+            results.append(result)
+
+        assets = []
+        for item, result in zip(manifest, results):
+            if isinstance(result, Exception):
+                errors.append({
+                    "agent_name": "ContentCreatorAgent",
+                    "error_type": "generation_error",
+                    "message": f"Failed to generate {item.get('recommended_asset_type', 'asset')}: {str(result)}",
+                    "recoverable": True
+                })
+            elif result:
+                assets.append(result)
+
+        return {"generated_assets": assets, "errors": errors}
+
+    def _batch_api(self, manifest: list, state: AgentState) -> list:
+        """
+        Generates the manifest through the provider's batch API (batch_mode="async"),
+        blocking until the batch finishes. Rows the batch did not complete come back
+        as exceptions so batch_generate records them like any other failure.
+        """
+        requests = {
+            f"asset-{n}": self.prompt.format_messages(**_asset_inputs(
+                item,
+                state.get("campaign_brief", {}),
+                state.get("strategy_framework", ""),
+                state.get("refinement_instructions", ""),
+                state.get("brand_voice", ""),
+                state.get("brand_tone", ""),
+            ))
+            for n, item in enumerate(manifest)
         }
+        try:
+            texts = BatchProcessor(temperature=self.temperature).run(requests)
+        except Exception as e:
+            return [e] * len(manifest)
+        return [
+            _build_asset(item, texts[f"asset-{n}"]) if f"asset-{n}" in texts
+            else RuntimeError("Batch request did not complete")
+            for n, item in enumerate(manifest)
+        ]
 
-    def batch_generate(self, state: AgentState) -> dict:
+    async def _abatch(self, manifest: list, state: AgentState, promoter=None) -> list:
         """
-        Generates assets concurrently using a thread pool.
+        Generates the manifest in groups of CONTENT_BATCH_SIZE rows per LLM call, bounded by
+        LLM_CONCURRENCY. Rows a group call fails to return fall back to one streamed call per asset.
         """
-        manifest = state.get("content_manifest", [])
         brief = state.get("campaign_brief", {})
         strategy = state.get("strategy_framework", "")
         instructions = state.get("refinement_instructions", "")
         company_name = state.get("company_name", "Company")
         brand_voice = state.get("brand_voice", "")
         brand_tone = state.get("brand_tone", "")
+        context = (brief, strategy, company_name, instructions, brand_voice, brand_tone)
 
-        assets = []
-        errors = state.get("errors", [])
-
-        # Normalize asset types
-        for item in manifest:
-            if "asset_type" not in item and "recommended_asset_type" in item:
-                item["asset_type"] = item["recommended_asset_type"]
-            elif "asset_type" not in item:
-                item["asset_type"] = "Blog Post"
-
-        def generate_one(item):
-            time.sleep(1)  # Basic rate limiting between thread starts
-            return self.generate_asset(item, brief, strategy, company_name, instructions, brand_voice, brand_tone)
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            futures = {executor.submit(generate_one, item): item for item in manifest}
-            for future in concurrent.futures.as_completed(futures):
+        sem = asyncio.Semaphore(int(os.getenv("LLM_CONCURRENCY", "20")))
+        # Early promos are capped at PROMO_CONCURRENCY, like PromotionalAgent.batch_promote
+        promo_sem = asyncio.Semaphore(int(os.getenv("PROMO_CONCURRENCY", "8")))
+        group_size = max(1, int(os.getenv("CONTENT_BATCH_SIZE", "3")))
+        promo_tasks = {}
+
+        async def promote(asset):
+            async with promo_sem:
+                return await promoter(asset)
+
+        def start_promo(n, preview):
+            if promoter and n not in promo_tasks:
+                promo_tasks[n] = asyncio.create_task(promote({"id": manifest[n].get("id"), "content": preview}))
+
+        async def single(n):
+            async with sem:
+                return await self.agenerate_asset(
+                    manifest[n], *context, on_preview=lambda preview: start_promo(n, preview)
+                )
+
+        async def group(indices):
+            if len(indices) > 1:
                 try:
-                    result = future.result()
-                    if result:
-                        assets.append(result)
+                    async with sem:
+                        results = await self.agenerate_group([manifest[n] for n in indices], *context)
                 except Exception as e:
-                    item = futures[future]
-                    errors.append({
-                        "agent_name": "ContentCreatorAgent",
-                        "error_type": "generation_error",
-                        "message": f"Failed to generate {item.get('recommended_asset_type', 'asset')}: {str(e)}",
-                        "recoverable": True
-                    })
+                    print(f"Batched generation failed, falling back to per-asset calls: {e}")
+                    results = [None] * len(indices)
+            else:
+                results = [None]
+            for n, r in zip(indices, results):
+                if r is not None:
+                    start_promo(n, r["content"][:PROMO_PREVIEW_CHARS])
+            missing = [i for i, r in enumerate(results) if r is None]
+            retried = await asyncio.gather(*[single(indices[i]) for i in missing], return_exceptions=True)
+            for i, r in zip(missing, retried):
+                results[i] = r
+            return results
 
-        return {"generated_assets": assets, "errors": errors}
+        groups = [list(range(i, min(i + group_size, len(manifest)))) for i in range(0, len(manifest), group_size)]
+        grouped = await asyncio.gather(*[group(g) for g in groups])
+        results = [result for results in grouped for result in results]
+
+        for n, result in enumerate(results):
+            if isinstance(result, dict):
+                # Short assets never reach the preview length while streaming
+                start_promo(n, result["content"][:PROMO_PREVIEW_CHARS])
+        for n, task in promo_tasks.items():
+            try:
+                promo = await task
+            except Exception as e:
+                # Left without promo so the promotion node retries and records the error
+                print(f"Early promo generation failed: {e}")
+                continue
+            if isinstance(results[n], dict):
+                results[n]["promotional_materials"] = promo
+        return results
@@ -1,31 +1,17 @@
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 from core.state import AgentState
-from core.llm import get_llm
+from core.llm import get_llm, cache_prefix
+from core.serialize import to_json, FastJsonOutputParser
 
 class JTBDAnalyst:
     def __init__(self):
         self.temperature = 0.2
 
-    def analyze_jobs(self, state: AgentState) -> dict:
-        """
-        Maps Jobs to be Done (JTBD) for each persona.
-        """
-        brief = state.get("campaign_brief", {})
-        personas = state.get("personas", [])
-        llm = get_llm(temperature=self.temperature)
-
-        prompt = ChatPromptTemplate.from_template(
-            """
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """
             You are a JTBD (Jobs to be Done) Expert.
             For the defined campaign and personas, list the specific "jobs" they are trying to hire a solution for.
 
-            **Campaign Context:**
-            {brief}
-
-            **Personas:**
-            {personas}
-
             1. Analyze the Personas and Campaign Brief to identify high-value Jobs to be Done.
             2. Generate a list of 4-6 distinct JTBDs across the identified personas.
             3. **STRATEGIC ASSET MIX:** For EACH job, you MUST explicitly assign a `recommended_asset_type`.
@@ -47,23 +33,38 @@ class JTBDAnalyst:
                     "buying_stage": "Awareness|Evaluation|Decision"
                 }}
             ]
-            """
-        )
+            """),
+            ("human", """
+            **Campaign Context:**
+            {brief}
+
+            **Personas:**
+            {personas}
+            """),
+        ])
+        self.parser = FastJsonOutputParser()
+
+    def analyze_jobs(self, state: AgentState) -> dict:
+        """
+        Maps Jobs to be Done (JTBD) for each persona.
+        """
+        brief = state.get("campaign_brief", {})
+        personas = state.get("personas", [])
+        llm = get_llm(temperature=self.temperature)
 
-        chain = prompt | llm | JsonOutputParser()
+        chain = self.prompt | cache_prefix | llm | self.parser
         try:
-            result = chain.invoke({"brief": str(brief), "personas": str(personas)})
+            result = chain.invoke({"brief": to_json(brief), "personas": to_json(personas)})
             # Ensure result is a list
             if isinstance(result, dict) and "jobs" in result:
                 result = result["jobs"]
             return {"content_manifest": result}
         except Exception as e:
             print(f"Error in JTBD: {e}")
-            errors = state.get("errors", [])
-            errors.append({
+            errors = [{
                 "agent_name": "JTBDAnalyst",
                 "error_type": "api_error",
                 "message": str(e),
                 "recoverable": True
-            })
+            }]
             return {"content_manifest": [], "errors": errors}
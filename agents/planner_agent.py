@@ -0,0 +1,112 @@
+from langchain_core.prompts import ChatPromptTemplate
+from core.state import AgentState
+from core.llm import get_llm, cache_prefix
+from core.serialize import to_json, FastJsonOutputParser
+
+class PlannerAgent:
+    """
+    Produces the campaign brief and the JTBD content manifest in a single LLM call,
+    replacing the CampaignArchitectAgent -> JTBDAnalyst round-trip in the main graph.
+    Both agents remain available for re-running either half on its own.
+    """
+
+    def __init__(self):
+        self.temperature = 0.3
+
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """
+            You are a Campaign Manager and JTBD (Jobs to be Done) Expert.
+            Create a Campaign Brief based on the strategy provided for the company, then map the
+            specific "jobs" the campaign's personas are trying to hire a solution for.
+
+            **Part 1 - Campaign Brief:**
+            1. Analyze the research and segments to select **EXACTLY ONE** Primary Target Segment.
+            2. High-value selection: Choose the segment with the highest growth potential OR the clearest pain point alignment.
+            3. Build the campaign strategy around this specific segment.
+            4. You MUST include 'primary_target_segment' and 'segment_rationale'.
+
+            **Part 2 - Content Manifest:**
+            1. Analyze the Personas and the Brief from Part 1 to identify high-value Jobs to be Done.
+            2. Generate a list of 4-6 distinct JTBDs across the identified personas.
+            3. **STRATEGIC ASSET MIX:** For EACH job, you MUST explicitly assign a `recommended_asset_type`.
+               - **Mandatory Diversity:** You MUST include at least 3 different asset types in the final list.
+               - **Options:** Blog Post, LinkedIn Post, Email Sequence, Whitepaper, Case Study, Webinar Script, Landing Page.
+               - **Selection Logic:**
+                 - Awareness Stage -> LinkedIn Post, Blog Post.
+                 - Evaluation Stage -> Whitepaper, Case Study, Webinar Script.
+                 - Decision Stage -> Landing Page, Email Sequence (Nurture).
+
+            **Output Format (JSON):**
+            {{
+                "campaign_brief": {{
+                    "company_name": "The company name",
+                    "campaign_name": "Strategic Campaign Name",
+                    "primary_target_segment": "Name of the ONE selected segment",
+                    "segment_rationale": "Detailed strategic justification for why THIS segment was chosen over others.",
+                    "primary_target_persona": "The lead persona within this segment",
+                    "objective": "Clear, measurable business goal (e.g., Increase demo requests by 20%)",
+                    "core_theme": "The overarching creative/strategic angle",
+                    "target_audience_summary": "Who we are talking to and why they care",
+                    "key_messages": ["Message 1", "Message 2", "Message 3"],
+                    "funnel_stage_focus": "Awareness|Evaluation|Decision"
+                }},
+                "content_manifest": [
+                    {{
+                        "persona_role": "Title",
+                        "jtbd": "Specific job...",
+                        "burning_question": "What specifically are they asking?",
+                        "recommended_asset_type": "Asset Type",
+                        "buying_stage": "Awareness|Evaluation|Decision"
+                    }}
+                ]
+            }}
+            """),
+            ("human", """
+            **Company:** {company_name}
+
+            **Strategy:**
+            {strategy}
+
+            **Available Segments:**
+            {segments}
+
+            **Personas:**
+            {personas}
+            """),
+        ])
+        self.parser = FastJsonOutputParser()
+
+    def plan(self, state: AgentState) -> dict:
+        """
+        Creates the campaign brief and content manifest together.
+        """
+        llm = get_llm(temperature=self.temperature)
+        strategy = state.get("strategy_framework", "")
+        personas = state.get("personas", [])
+        segments = state.get("segments", [])
+        company_name = state.get("company_name", "the Client")
+
+        chain = self.prompt | cache_prefix | llm | self.parser
+        try:
+            result = chain.invoke({
+                "company_name": company_name,
+                "strategy": strategy,
+                "personas": to_json(personas),
+                "segments": to_json(segments)
+            })
+            brief = result.get("campaign_brief") if isinstance(result, dict) else None
+            manifest = result.get("content_manifest") if isinstance(result, dict) else None
+            if isinstance(manifest, dict) and "jobs" in manifest:
+                manifest = manifest["jobs"]
+            if not isinstance(brief, dict) or not isinstance(manifest, list):
+                raise ValueError("Planner response is missing 'campaign_brief' or 'content_manifest'")
+            return {"campaign_brief": brief, "content_manifest": manifest}
+        except Exception as e:
+            print(f"Error in PlannerAgent: {e}")
+            errors = [{
+                "agent_name": "PlannerAgent",
+                "error_type": "api_error",
+                "message": str(e),
+                "recoverable": True
+            }]
+            return {"campaign_brief": {"error": str(e)}, "content_manifest": [], "errors": errors}
@@ -1,37 +1,23 @@
+import asyncio
+import os
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from core.state import AgentState
-from core.llm import get_llm
+from core.runtime import run as run_async
+from core.llm import get_llm, cache_prefix
+from core.batch import BatchProcessor, batch_supported
 
+# Promo copy is written from the opening of an asset, so it can start once this much has streamed
+PROMO_PREVIEW_CHARS = 1000
 
 class PromotionalAgent:
     def __init__(self):
         self.temperature = 0.5
 
-    def generate_promo(self, asset: dict, brand_voice: str = "", brand_tone: str = "") -> dict:
-        """
-        Creates promo materials for a generated asset.
-        """
-        llm = get_llm(temperature=self.temperature)
-        content_preview = asset.get("content", "")[:1000]
-
-        brand_block = ""
-        if brand_voice or brand_tone:
-            brand_block = f"""
-            **BRAND VOICE & TONE:**
-            - Voice: {brand_voice or 'Not specified'}
-            - Tone: {brand_tone or 'Not specified'}
-            All promotional copy MUST reflect this voice and tone consistently.
-            """
-
-        prompt = ChatPromptTemplate.from_template(
-            """
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """
             You are a Social Media & Email Marketing Manager.
-            Create promotional copy for the following new piece of content.
-
-            **Content Preview:**
-            {content}
-            {brand_block}
+            Create promotional copy for the new piece of content provided.
 
             **Deliverables:**
             1. **LinkedIn Post:** Hook-driven, professional but conversational, 3 hashtags.
@@ -43,36 +29,106 @@ class PromotionalAgent:
             4. **Tweet/X Post:** Punchy, short.
 
             Output as Markdown.
-            """
-        )
+            """),
+            ("human", """
+            **Content Preview:**
+            {content}
+            {brand_block}
+            """),
+        ])
+        self.parser = StrOutputParser()
 
-        chain = prompt | llm | StrOutputParser()
-        promo_content = chain.invoke({"content": content_preview, "brand_block": brand_block})
+    def generate_promo(self, asset: dict, brand_voice: str = "", brand_tone: str = "") -> dict:
+        """
+        Creates promo materials for a generated asset.
+        """
+        llm = get_llm(temperature=self.temperature)
+        chain = self.prompt | cache_prefix | llm | self.parser
+        promo_content = chain.invoke(self._inputs(asset, brand_voice, brand_tone))
+
+        return {
+            "parent_asset_id": asset.get("id"),
+            "promo_content": promo_content
+        }
+
+    async def agenerate_promo(self, asset: dict, brand_voice: str = "", brand_tone: str = "") -> dict:
+        """
+        Async version of generate_promo. Only the first PROMO_PREVIEW_CHARS of the
+        asset are used, so it can run on a partially streamed asset.
+        """
+        llm = get_llm(temperature=self.temperature)
+        chain = self.prompt | cache_prefix | llm | self.parser
+        promo_content = await chain.ainvoke(self._inputs(asset, brand_voice, brand_tone))
 
         return {
             "parent_asset_id": asset.get("id"),
             "promo_content": promo_content
         }
 
+    def _inputs(self, asset: dict, brand_voice: str, brand_tone: str) -> dict:
+        brand_block = ""
+        if brand_voice or brand_tone:
+            brand_block = f"""
+            **BRAND VOICE & TONE:**
+            - Voice: {brand_voice or 'Not specified'}
+            - Tone: {brand_tone or 'Not specified'}
+            All promotional copy MUST reflect this voice and tone consistently.
+            """
+        return {"content": asset.get("content", "")[:PROMO_PREVIEW_CHARS], "brand_block": brand_block}
+
     def batch_promote(self, state: AgentState) -> dict:
         """
-        Generates promo content for each asset (kept in-memory, no filesystem writes).
+        Generates promo content for each asset concurrently (kept in-memory, no filesystem writes).
+        Assets that already received promo copy during content generation are skipped.
         """
         assets = state.get("generated_assets", [])
-        errors = state.get("errors", [])
+        errors = []
         brand_voice = state.get("brand_voice", "")
         brand_tone = state.get("brand_tone", "")
 
-        for asset in assets:
-            try:
-                promo = self.generate_promo(asset, brand_voice, brand_tone)
-                asset["promotional_materials"] = promo["promo_content"]
-            except Exception as e:
+        pending = [asset for asset in assets if not asset.get("promotional_materials")]
+        if state.get("batch_mode") == "async" and batch_supported():
+            results = self._batch_api(pending, brand_voice, brand_tone)
+        else:
+            results = run_async(self._abatch(pending, brand_voice, brand_tone))
+
+        for asset, result in zip(pending, results):
+            if isinstance(result, Exception):
                 errors.append({
                     "agent_name": "PromotionalAgent",
                     "error_type": "api_error",
-                    "message": f"Failed to generate promo for asset '{asset.get('title', 'unknown')}': {str(e)}",
+                    "message": f"Failed to generate promo for asset '{asset.get('title', 'unknown')}': {str(result)}",
                     "recoverable": True
                 })
+            else:
+                asset["promotional_materials"] = result["promo_content"]
 
         return {"generated_assets": assets, "errors": errors}
+
+    def _batch_api(self, assets: list, brand_voice: str, brand_tone: str) -> list:
+        """
+        Generates promo copy through the provider's batch API (batch_mode="async").
+        Assets the batch did not complete come back as exceptions.
+        """
+        requests = {
+            f"promo-{n}": self.prompt.format_messages(**self._inputs(asset, brand_voice, brand_tone))
+            for n, asset in enumerate(assets)
+        }
+        try:
+            texts = BatchProcessor(temperature=self.temperature).run(requests)
+        except Exception as e:
+            return [e] * len(assets)
+        return [
+            {"parent_asset_id": asset.get("id"), "promo_content": texts[f"promo-{n}"]} if f"promo-{n}" in texts
+            else RuntimeError("Batch request did not complete")
+            for n, asset in enumerate(assets)
+        ]
+
+    async def _abatch(self, assets: list, brand_voice: str, brand_tone: str) -> list:
+        sem = asyncio.Semaphore(int(os.getenv("PROMO_CONCURRENCY", "8")))
+
+        async def promote(asset):
+            async with sem:
+                return await self.agenerate_promo(asset, brand_voice, brand_tone)
+
+        return await asyncio.gather(*[promote(a) for a in assets], return_exceptions=True)
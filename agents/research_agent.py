@@ -1,37 +1,28 @@
-import json
-from dotenv import load_dotenv, find_dotenv
+import orjson
+import os
+from core.env import load_env
 
-# Force load env to be safe, searching in parent directories
-load_dotenv(find_dotenv(), override=True)
+# Scripts that import agents directly still get .env settings
+load_env()
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from core.state import AgentState
-from core.llm import get_llm
+from core.runtime import run as run_async
+from core.llm import get_llm, cache_prefix
+from core.serialize import FastJsonOutputParser
+from core.llm_cache import acached_invoke
+from core.prep import select_chunks
 
 class CompanyResearchAgent:
     def __init__(self):
         self.temperature = 0
 
-    def research(self, state: AgentState) -> dict:
-        """
-        Analyzes company inputs and web content to produce a deep research report.
-        """
-        print(f"--- Researching Company: {state.get('company_name', 'Unknown')} ---")
-        llm = get_llm(temperature=self.temperature)
-
-        web_content = state.get("raw_web_content", "")
-        doc_content = state.get("raw_doc_content", "")
-
-        prompt = ChatPromptTemplate.from_template(
-            """
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """
             You are a minimalist but deep-thinking Senior Market Analyst.
 
-            Your goal is to perform a DEEP RESEARCH analysis on the company described below and identify the Company Name.
-
-            **Input Data:**
-            - Web Content: {web_content}
-            - Internal Documents: {doc_content}
+            Your goal is to perform a DEEP RESEARCH analysis on the company described in the input data and identify the Company Name.
 
             **Task:**
             1. **Extract Company Name:** Identify the official or commonly used name of the company from the provided data.
@@ -46,42 +37,65 @@ class CompanyResearchAgent:
                 "company_name": "The Extracted Name",
                 "deep_research": "The full Markdown report content here..."
             }}
-            """
-        )
+            """),
+            ("human", """
+            **Input Data:**
+            - Web Content: {web_content}
+            - Internal Documents: {doc_content}
+            """),
+        ])
+        self.json_parser = FastJsonOutputParser()
+        self.str_parser = StrOutputParser()
 
-        from langchain_core.output_parsers import JsonOutputParser
+    def research(self, state: AgentState) -> dict:
+        """
+        Analyzes company inputs and web content to produce a deep research report.
+        """
+        return run_async(self.aresearch(state))
+
+    async def aresearch(self, state: AgentState) -> dict:
+        """
+        Async version of research, so the graph can overlap it with other I/O.
+        """
+        print(f"--- Researching Company: {state.get('company_name', 'Unknown')} ---")
+        llm = get_llm(temperature=self.temperature)
+
+        # Keep the passages most relevant to the research question instead of a blind prefix
+        query = f"{state.get('company_name', '')} value proposition product customers market pricing"
+        budget = int(os.getenv("RESEARCH_TOKEN_BUDGET", "12000"))
+        web_content = select_chunks(state.get("raw_web_content", ""), query, budget)
+        doc_content = select_chunks(state.get("raw_doc_content", ""), query, budget)
 
         try:
-            chain = prompt | llm | JsonOutputParser()
-            result = chain.invoke({
-                "web_content": web_content[:50000],
-                "doc_content": doc_content[:50000]
-            })
+            chain = self.prompt | cache_prefix | llm | self.json_parser
+            result = await acached_invoke(self.prompt, chain, {
+                "web_content": web_content,
+                "doc_content": doc_content
+            }, self.temperature)
             return result
         except Exception as json_err:
             print(f"JSON parsing failed, trying string fallback: {json_err}")
             try:
-                chain_str = prompt | llm | StrOutputParser()
-                raw = chain_str.invoke({
-                    "web_content": web_content[:50000],
-                    "doc_content": doc_content[:50000]
+                chain_str = self.prompt | cache_prefix | llm | self.str_parser
+                raw = await chain_str.ainvoke({
+                    "web_content": web_content,
+                    "doc_content": doc_content
                 })
                 cleaned = raw.strip()
                 if cleaned.startswith("```"):
                     lines = cleaned.split("\n")
                     lines = [l for l in lines if not l.strip().startswith("```")]
                     cleaned = "\n".join(lines)
-                result = json.loads(cleaned)
+                result = orjson.loads(cleaned)
                 return result
             except Exception as fallback_err:
                 print(f"String fallback also failed: {fallback_err}")
-                errors = state.get("errors", [])
-                errors.append({
+                errors = [{
                     "agent_name": "CompanyResearchAgent",
                     "error_type": "api_error",
                     "message": str(json_err),
                     "recoverable": True
-                })
+                }]
                 return {
                     "company_name": state.get("company_name", "Unknown"),
                     "deep_research": f"Error during research: {str(json_err)}",
@@ -1,7 +1,23 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+import asyncio
+import os
+from langchain_core.messages import HumanMessage, SystemMessage
 from core.state import AgentState
-from core.llm import get_llm
+from core.runtime import run as run_async
+from core.llm import get_llm, mark_cache_prefix, message_text
+from core.serialize import parse_json
+
+# Built once at import; the research is formatted into the human turn per call
+_SYSTEM_MESSAGE = SystemMessage(content=(
+    "You are an expert Go-To-Market Strategist. From the company research, identify:\n"
+    "1. segments: the 2-3 ideal market segments (industries/verticals) to target.\n"
+    "2. personas: the buying committee for the top segment "
+    "(e.g. Economic Buyer, Champion, User, Technical Evaluator).\n"
+    "Return only JSON with this shape:\n"
+    '{"segments":[{"name":str,"rationale":str}],'
+    '"personas":[{"role":str,"type":str,"job_to_be_done":str,"pain_points":[str]}]}'
+))
+_HUMAN_TEMPLATE = "Research:\n{research}"
+
 
 class MarketSegmentAgent:
     def __init__(self):
@@ -11,55 +27,53 @@ class MarketSegmentAgent:
         """
         Identifies market segments and buying committee personas based on deep research.
         """
-        research = state.get("deep_research", "")
-        llm = get_llm(temperature=self.temperature)
-
-        prompt = ChatPromptTemplate.from_template(
-            """
-            You are an expert Go-To-Market Strategist.
-            Based on the provided company research, identify the core Market Segments and the Buying Committee Personas.
+        return run_async(self.aanalyze(state))
 
-            **Research Context:**
-            {research}
-
-            **Task:**
-            1. **Segments:** Identify 2-3 ideal market segments (Industries/Verticals) this company should target.
-            2. **Personas:** For the TOP segment, identify the Buying Committee members (e.g., Economic Buyer, Champion, User, Technical Evaluator).
-
-            **Output Format:**
-            Return a JSON object with two keys: "segments" (list) and "personas" (list).
+    async def aanalyze(self, state: AgentState) -> dict:
+        """
+        Async version of analyze, so the graph can run it alongside competitor analysis.
+        """
+        llm = get_llm(temperature=self.temperature)
+        try:
+            response = await llm.ainvoke(self._messages(state))
+        except Exception as e:
+            response = e
+        # JSON decoding of a long reply is CPU work; keep it off the event loop
+        return await asyncio.to_thread(self._result, state, response)
 
-            Example JSON Structure:
-            {{
-                "segments": [
-                    {{"name": "Enterprise Fintech", "rationale": "..."}},
-                    ...
-                ],
-                "personas": [
-                    {{"role": "CTO", "type": "Economic Buyer", "job_to_be_done": "Reduce infrastructure costs", "pain_points": ["High maintenance", "Security risks"]}},
-                    ...
-                ]
-            }}
-            """
+    def analyze_batch(self, states: list) -> list:
+        """
+        Runs analyze for several companies with concurrent model calls (LLM_CONCURRENCY).
+        """
+        llm = get_llm(temperature=self.temperature)
+        responses = llm.batch(
+            [self._messages(state) for state in states],
+            config={"max_concurrency": int(os.getenv("LLM_CONCURRENCY", "20"))},
+            return_exceptions=True,
         )
+        return [self._result(state, response) for state, response in zip(states, responses)]
 
-        chain = prompt | llm | JsonOutputParser()
+    def _messages(self, state: AgentState) -> list:
+        research = state.get("deep_research_compact") or state.get("deep_research", "")
+        return mark_cache_prefix([_SYSTEM_MESSAGE, HumanMessage(content=_HUMAN_TEMPLATE.format(research=research))])
 
+    def _result(self, state: AgentState, response) -> dict:
         try:
-            result = chain.invoke({"research": research})
+            if isinstance(response, Exception):
+                raise response
+            result = parse_json(message_text(response))
             return {
                 "segments": result.get("segments", []),
                 "personas": result.get("personas", [])
             }
         except Exception as e:
             print(f"Error in MarketSegmentAgent: {e}")
-            errors = state.get("errors", [])
-            errors.append({
+            errors = [{
                 "agent_name": "MarketSegmentAgent",
                 "error_type": "api_error",
                 "message": str(e),
                 "recoverable": True
-            })
+            }]
             return {"segments": [], "personas": [], "errors": errors}
 
 if __name__ == "__main__":
@@ -1,7 +1,40 @@
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+import io
+import os
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableParallel
 from core.state import AgentState
-from core.llm import get_llm
+from core.runtime import run as run_async
+from core.llm import get_llm, mark_cache_prefix, message_text
+from core.prep import CHARS_PER_TOKEN
+from core.serialize import to_json
+
+# Built once at import; the context is formatted into the human turns per call
+_SYSTEM_MESSAGE = SystemMessage(content=(
+    "You are a Chief Marketing Officer. Write a Positioning and Messaging Framework "
+    "for the company, in Markdown, with:\n"
+    "1. Core Positioning Statement (For [target], who [need], [Company] is a [category] that [benefit]).\n"
+    "2. Key Messaging Pillars: 3 themes the company must hit to win against competitors.\n"
+    "3. Differentiation: how the company sounds different from the competitors analyzed."
+))
+# Research and competitor analysis are large and unchanged when the strategy is re-run
+_CONTEXT_TEMPLATE = "Research:\n{research}\n\nCompetitors:\n{competitors}"
+_HUMAN_TEMPLATE = "Company: {company_name}\nTarget segments: {segments_str}{brand_guidelines_block}"
+
+# Contexts larger than STRATEGY_SUMMARY_TOKENS are condensed first, research and competitors in parallel
+_RESEARCH_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Condense this company research to about a quarter of its length. Keep the value "
+               "proposition, products, customers, proof points and market facts; drop everything else."),
+    ("human", "{research}"),
+])
+_COMPETITOR_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Condense this competitive analysis to about a quarter of its length. Keep each "
+               "competitor's positioning, the positioning gaps and the top battlecard points."),
+    ("human", "{competitors}"),
+])
+
 
 class StrategyAgent:
     def __init__(self):
@@ -11,65 +44,118 @@ class StrategyAgent:
         """
         Drafts key positioning and messaging frameworks.
         """
+        return run_async(self.adevelop_strategy(state))
+
+    async def adevelop_strategy(self, state: AgentState, on_chunk=None) -> dict:
+        """
+        Async version of develop_strategy. Streams the framework; `on_chunk` (if given)
+        is called with each piece of text as it arrives, e.g. to render progress.
+        """
+        llm = get_llm(temperature=self.temperature)
+        contexts = await asyncio.to_thread(self._contexts, [state])
+        messages = self._messages(state, *contexts[0])
+        buffer = io.StringIO()
+        try:
+            async for chunk in llm.astream(messages):
+                text = message_text(chunk)
+                buffer.write(text)
+                if on_chunk and text:
+                    on_chunk(text)
+            response = AIMessage(content=buffer.getvalue())
+        except Exception as e:
+            response = e
+        return self._result(state, response)
+
+    def develop_strategy_batch(self, states: list) -> list:
+        """
+        Runs develop_strategy for several companies with concurrent model calls (LLM_CONCURRENCY).
+        """
         llm = get_llm(temperature=self.temperature)
-        research = state.get("deep_research", "")
+        responses = llm.batch(
+            [self._messages(state, *context) for state, context in zip(states, self._contexts(states))],
+            config={"max_concurrency": int(os.getenv("LLM_CONCURRENCY", "20"))},
+            return_exceptions=True,
+        )
+        return [self._result(state, response) for state, response in zip(states, responses)]
+
+    def _contexts(self, states: list) -> list:
+        """
+        (research, competitors) for each state. Where the two together exceed
+        STRATEGY_SUMMARY_TOKENS, both are replaced by summaries generated concurrently;
+        if summarizing fails the full text is kept.
+        """
+        contexts = [
+            (state.get("deep_research_compact") or state.get("deep_research", ""), state.get("competitor_analysis", ""))
+            for state in states
+        ]
+        budget_chars = int(os.getenv("STRATEGY_SUMMARY_TOKENS", "6000")) * CHARS_PER_TOKEN
+        large = [n for n, (research, competitors) in enumerate(contexts) if len(research) + len(competitors) > budget_chars]
+        if not large:
+            return contexts
+
+        llm = get_llm(temperature=0)
+        summarize = RunnableParallel(
+            research=_RESEARCH_SUMMARY_PROMPT | llm | StrOutputParser(),
+            competitors=_COMPETITOR_SUMMARY_PROMPT | llm | StrOutputParser(),
+        )
+        print(f"--- Summarizing strategy context for {len(large)} run(s) ---")
+        summaries = summarize.batch(
+            [{"research": contexts[n][0], "competitors": contexts[n][1]} for n in large],
+            config={"max_concurrency": int(os.getenv("LLM_CONCURRENCY", "20"))},
+            return_exceptions=True,
+        )
+        for n, summary in zip(large, summaries):
+            if isinstance(summary, Exception):
+                print(f"Strategy context summary failed, using full text: {summary}")
+            else:
+                contexts[n] = (summary["research"], summary["competitors"])
+        return contexts
+
+    def _messages(self, state: AgentState, research: str, competitors: str) -> list:
         segments = state.get("segments", [])
-        competitors = state.get("competitor_analysis", "")
         company_name = state.get("company_name", "the Client")
         brand_voice = state.get("brand_voice", "")
         brand_tone = state.get("brand_tone", "")
         messaging_pillars = state.get("messaging_pillars", [])
 
-        # Convert segments list to string for prompt
-        segments_str = str(segments)
+        # Compact JSON of just the fields the CMO prompt needs
+        segments_str = to_json([
+            {"name": seg.get("name", ""), "rationale": seg.get("rationale", "")}
+            for seg in segments
+            if isinstance(seg, dict)
+        ])
 
+        # Only the brand settings actually provided, without placeholder filler
+        brand_lines = [
+            f"{label}: {value}"
+            for label, value in (
+                ("Voice", brand_voice),
+                ("Tone", brand_tone),
+                ("Key pillars", ", ".join(messaging_pillars)),
+            )
+            if value
+        ]
         brand_guidelines_block = ""
-        if brand_voice or brand_tone or messaging_pillars:
-            pillars_str = ", ".join(messaging_pillars) if messaging_pillars else "N/A"
-            brand_guidelines_block = f"""
-            **BRAND GUIDELINES (Must be reflected in all messaging):**
-            - Voice: {brand_voice or 'Not specified'}
-            - Tone: {brand_tone or 'Not specified'}
-            - Key Pillars: {pillars_str}
-            """
-
-        prompt = ChatPromptTemplate.from_template(
-            """
-            You are a Chief Marketing Officer (CMO) for {company_name}.
-            Develop a high-level Positioning and Messaging Framework strategy.
+        if brand_lines:
+            brand_guidelines_block = "\nBrand guidelines (must be reflected in all messaging):\n" + "\n".join(brand_lines)
 
-            **Context:**
-            - Company: {company_name}
-            - Research: {research}
-            - Competitors: {competitors}
-            - Target Segments: {segments_str}
-            {brand_guidelines_block}
+        return mark_cache_prefix([
+            _SYSTEM_MESSAGE,
+            HumanMessage(content=_CONTEXT_TEMPLATE.format(research=research, competitors=competitors)),
+            HumanMessage(content=_HUMAN_TEMPLATE.format(
+                company_name=company_name,
+                segments_str=segments_str,
+                brand_guidelines_block=brand_guidelines_block
+            )),
+        ])
 
-            **Requirements:**
-            1. **Core Positioning Statement:** (For [Internal], who [Statement of Need], {company_name} is a [Category] that [Statement of Benefit]...)
-            2. **Key Messaging Pillars:** 3 core themes {company_name} must hit to win against competitors.
-            3. **Differentiation:** Explicitly state how {company_name} sounds different from the competitors found in the analysis.
-
-            Output as Markdown.
-            """
-        )
-
-        chain = prompt | llm | StrOutputParser()
-        try:
-            result = chain.invoke({
-                "company_name": company_name,
-                "research": research,
-                "competitors": competitors,
-                "segments_str": segments_str,
-                "brand_guidelines_block": brand_guidelines_block
-            })
-            return {"strategy_framework": result}
-        except Exception as e:
-            errors = state.get("errors", [])
-            errors.append({
-                "agent_name": "StrategyAgent",
-                "error_type": "api_error",
-                "message": str(e),
-                "recoverable": True
-            })
-            return {"strategy_framework": f"Error in StrategyAgent: {str(e)}", "errors": errors}
+    def _result(self, state: AgentState, response) -> dict:
+        if not isinstance(response, Exception):
+            return {"strategy_framework": message_text(response)}
+        errors = [{
+            "agent_name": "StrategyAgent",
+            "error_type": "api_error",
+            "message": str(response),
+            "recoverable": True
+        }]
+        return {"strategy_framework": f"Error in StrategyAgent: {str(response)}", "errors": errors}
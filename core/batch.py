@@ -0,0 +1,139 @@
+import io
+import os
+import time
+
+import orjson
+
+from core.llm import get_model_name, get_provider
+
+# Providers with an asynchronous (discounted, up to 24h) batch endpoint
+BATCH_PROVIDERS = ("anthropic", "openai")
+
+
+def batch_supported(provider: str = None) -> bool:
+    return (provider or get_provider()) in BATCH_PROVIDERS
+
+
+def _split_messages(messages: list) -> tuple:
+    """Splits LangChain messages into (system text, [{role, content}]) for the provider SDKs."""
+    system, turns = [], []
+    for m in messages:
+        content = m.content if isinstance(m.content, str) else "".join(
+            block.get("text", "") for block in m.content if isinstance(block, dict)
+        )
+        if m.type == "system":
+            system.append(content)
+        else:
+            turns.append({"role": "assistant" if m.type == "ai" else "user", "content": content})
+    return "\n\n".join(system), turns
+
+
+class BatchProcessor:
+    """
+    Submits many chat requests through the provider's batch API and waits for
+    the results. Intended for non-interactive runs: batches cost roughly half
+    as much but may take minutes to hours to complete.
+    """
+
+    def __init__(self, temperature: float = 0, poll_seconds: float = None, timeout_seconds: float = None):
+        self.provider = get_provider()
+        if not batch_supported(self.provider):
+            raise ValueError(f"Batch API is not supported for provider '{self.provider}'")
+        self.model = get_model_name(self.provider)
+        self.temperature = temperature
+        self.poll_seconds = poll_seconds or float(os.getenv("BATCH_POLL_SECONDS", "30"))
+        self.timeout_seconds = timeout_seconds or float(os.getenv("BATCH_TIMEOUT_SECONDS", "86400"))
+
+    def run(self, requests: dict) -> dict:
+        """
+        `requests` maps custom_id ([A-Za-z0-9_-], max 64 chars) to a list of
+        LangChain messages. Returns {custom_id: text} for the requests that
+        succeeded; failed or expired requests are absent.
+        """
+        if not requests:
+            return {}
+        if self.provider == "anthropic":
+            return self._run_anthropic(requests)
+        return self._run_openai(requests)
+
+    def _wait(self, retrieve, is_done):
+        deadline = time.monotonic() + self.timeout_seconds
+        while True:
+            batch = retrieve()
+            if is_done(batch):
+                return batch
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Batch {batch.id} did not finish within {self.timeout_seconds:.0f}s")
+            time.sleep(self.poll_seconds)
+
+    def _run_anthropic(self, requests: dict) -> dict:
+        import anthropic
+
+        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        entries = []
+        for custom_id, messages in requests.items():
+            system, turns = _split_messages(messages)
+            entries.append({
+                "custom_id": custom_id,
+                "params": {
+                    "model": self.model,
+                    "max_tokens": int(os.getenv("ANTHROPIC_MAX_TOKENS", "8192")),
+                    "temperature": self.temperature,
+                    "system": system,
+                    "messages": turns,
+                },
+            })
+
+        batch = client.messages.batches.create(requests=entries)
+        print(f"--- Submitted Anthropic batch {batch.id} ({len(entries)} requests) ---")
+        self._wait(
+            lambda: client.messages.batches.retrieve(batch.id),
+            lambda b: b.processing_status == "ended",
+        )
+
+        results = {}
+        for entry in client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = "".join(
+                    block.text for block in entry.result.message.content if block.type == "text"
+                )
+        return results
+
+    def _run_openai(self, requests: dict) -> dict:
+        from openai import OpenAI
+
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        lines = []
+        for custom_id, messages in requests.items():
+            system, turns = _split_messages(messages)
+            body_messages = ([{"role": "system", "content": system}] if system else []) + turns
+            lines.append(orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model, "temperature": self.temperature, "messages": body_messages},
+            }))
+
+        input_file = client.files.create(file=("batch.jsonl", io.BytesIO(b"\n".join(lines))), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        print(f"--- Submitted OpenAI batch {batch.id} ({len(lines)} requests) ---")
+        batch = self._wait(
+            lambda: client.batches.retrieve(batch.id),
+            lambda b: b.status in ("completed", "failed", "expired", "cancelled"),
+        )
+
+        results = {}
+        if batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = orjson.loads(line)
+                response = entry.get("response") or {}
+                if response.get("status_code") == 200:
+                    results[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return results
+
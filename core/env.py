@@ -0,0 +1,24 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env() -> None:
+    """
+    Loads the project-root .env into os.environ once per process (values in
+    .env override existing ones). Later calls are no-ops, so modules can call
+    this at import time without repeating the filesystem lookup.
+    """
+    global _loaded
+    with _lock:
+        if _loaded:
+            return
+        env_path = os.path.join(_ROOT_DIR, ".env")
+        if os.path.exists(env_path):
+            load_dotenv(dotenv_path=env_path, override=True)
+        _loaded = True
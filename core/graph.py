@@ -1,12 +1,25 @@
+import asyncio
+import copy
+import functools
+import hashlib
+import os
+import threading
+import time
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from core.state import AgentState
+from core.state import AgentState, apply_update, merge_errors
+from core.runtime import run as run_async
 from agents.research_agent import CompanyResearchAgent
 from agents.segment_agent import MarketSegmentAgent
 from agents.competitor_agent import CompetitorAgent
 from agents.strategy_agent import StrategyAgent
 from agents.campaign_agent import CampaignArchitectAgent
 from agents.jtbd_agent import JTBDAnalyst
-from utils.scraper import WebScraper
+from agents.planner_agent import PlannerAgent
+from core.prep import select_chunks
+from core.llm import get_model_name, get_provider
+from core.serialize import to_json
+from utils.scraper import SCRAPE_ERROR_PREFIX, WebScraper
 from utils.doc_loader import DocumentLoader
 
 # Initialize Agents
@@ -16,84 +29,260 @@ competitor_agent = CompetitorAgent()
 strategy_agent = StrategyAgent()
 campaign_agent = CampaignArchitectAgent()
 jtbd_agent = JTBDAnalyst()
+planner_agent = PlannerAgent()
 scraper = WebScraper()
+# Documents loaded by input_node when nothing was uploaded this session
+DATA_DIR = "data"
+
+# Node results keyed by "<node>::<input digest>": {key: (expires_at, result)}
+_NODE_CACHE_TTL = float(os.getenv("NODE_CACHE_TTL", "600"))
+_NODE_CACHE_MAX_ENTRIES = 256
+_node_cache = {}
+_node_cache_lock = threading.Lock()
+
+
+def _node_cache_key(name: str, state: AgentState, keys: tuple) -> str:
+    payload = {k: state.get(k) for k in keys}
+    payload["_model"] = f"{get_provider()}:{get_model_name()}"
+    return f"{name}::{hashlib.sha256(to_json(payload).encode()).hexdigest()[:32]}"
+
+
+def _node_cache_get(key: str):
+    with _node_cache_lock:
+        hit = _node_cache.get(key)
+        if hit and hit[0] > time.monotonic():
+            print(f"--- Node cache hit ({key.split('::')[0]}) ---")
+            return copy.deepcopy(hit[1])
+    return None
+
+
+def _node_cache_put(key: str, result: dict):
+    # Failed runs are retried rather than replayed
+    if result.get("errors"):
+        return
+    now = time.monotonic()
+    with _node_cache_lock:
+        if len(_node_cache) >= _NODE_CACHE_MAX_ENTRIES:
+            # Drop expired entries first, then the oldest if still full
+            for k in [k for k, (exp, _) in _node_cache.items() if exp <= now]:
+                del _node_cache[k]
+            if len(_node_cache) >= _NODE_CACHE_MAX_ENTRIES:
+                del _node_cache[next(iter(_node_cache))]
+        _node_cache[key] = (now + _NODE_CACHE_TTL, copy.deepcopy(result))
+
+
+def memoize_node(name: str, keys: tuple):
+    """
+    Reuses a node's result for NODE_CACHE_TTL seconds while the state keys it
+    reads (and the active model) are unchanged. Works for sync and async nodes;
+    both variants of a node share entries when given the same name.
+    """
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(state: AgentState):
+                key = _node_cache_key(name, state, keys)
+                cached = _node_cache_get(key)
+                if cached is not None:
+                    return cached
+                result = await fn(state)
+                _node_cache_put(key, result)
+                return result
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(state: AgentState):
+            key = _node_cache_key(name, state, keys)
+            cached = _node_cache_get(key)
+            if cached is not None:
+                return cached
+            result = fn(state)
+            _node_cache_put(key, result)
+            return result
+        return wrapper
+    return decorate
+
+
+def invalidate(key_prefix: str = "") -> int:
+    """Drops cached node results whose key starts with `key_prefix` (all by default)."""
+    with _node_cache_lock:
+        stale = [k for k in _node_cache if k.startswith(key_prefix)]
+        for k in stale:
+            del _node_cache[k]
+    return len(stale)
+
+
+_RESEARCH_KEYS = ("deep_research_compact", "deep_research")
+_SEGMENT_KEYS = _RESEARCH_KEYS
+_COMPETITOR_KEYS = _RESEARCH_KEYS + ("company_name",)
+_STRATEGY_KEYS = _RESEARCH_KEYS + (
+    "segments", "competitor_analysis", "company_name", "brand_voice", "brand_tone", "messaging_pillars",
+)
 
 # Node Functions
 def input_node(state: AgentState):
+    return run_async(ainput_node(state))
+
+async def ainput_node(state: AgentState):
     """
-    Scrapes the URL and loads documents.
+    Scrapes the URL and loads documents. Both are I/O-bound and independent,
+    so they run concurrently in worker threads.
     """
     print("--- Input Node ---")
     url = state.get("company_url")
-    files = state.get("uploaded_files", [])
-    files_dir = "data"
-    
-    web_content = ""
-    if url:
-        web_content = scraper.scrape(url)
-    
-    # Load docs (simplified loading of all valid files in data dir for now)
-    # Ideally we filter by the specific files uploaded in this session if passed
-    loader = DocumentLoader(files_dir)
-    doc_content = "\n".join(loader.load_files())
-    
+    files = state.get("uploaded_file_bytes", [])
+
+    async def scrape():
+        return await asyncio.to_thread(scraper.scrape, url) if url else ""
+
+    # Files uploaded this session when given, otherwise every valid file in the data dir
+    if files:
+        load_docs = functools.partial(DocumentLoader.load_from_bytes, files)
+    else:
+        load_docs = DocumentLoader(DATA_DIR).load_files
+    web_content, docs = await asyncio.gather(scrape(), asyncio.to_thread(load_docs))
+
+    # A failed scrape is reported as an error, not passed on as the page content
+    errors = []
+    if web_content.startswith(SCRAPE_ERROR_PREFIX):
+        errors.append({
+            "agent_name": "WebScraper",
+            "error_type": "scrape_error",
+            "message": web_content[len(SCRAPE_ERROR_PREFIX):],
+            "recoverable": True
+        })
+        web_content = ""
+
     return {
         "raw_web_content": web_content,
-        "raw_doc_content": doc_content
+        "raw_doc_content": "\n".join(docs),
+        "errors": errors
     }
 
 def research_node(state: AgentState):
-    return research_agent.research(state)
+    return run_async(aresearch_node(state))
+
+async def aresearch_node(state: AgentState):
+    """
+    Runs deep research. When the company name is already known (re-runs, batch
+    inputs), Tavily competitor intel is prefetched into the CompetitorAgent cache
+    meanwhile, so the competitors node does not wait on search; otherwise the name
+    only comes out of research, so there is nothing correct to prefetch.
+    """
+    company_name = state.get("company_name")
+    if not company_name:
+        return await research_agent.aresearch(state)
+    result, _ = await asyncio.gather(
+        research_agent.aresearch(state),
+        asyncio.to_thread(competitor_agent._fetch_tavily_intel, company_name)
+    )
+    return result
 
+def compact_research_node(state: AgentState):
+    """
+    Bounds the research report that segmentation, competitor and strategy prompts
+    all re-send: reports over RESEARCH_COMPACT_TOKENS keep their most relevant passages.
+    """
+    query = f"{state.get('company_name', '')} value proposition positioning customers market competitors"
+    budget = int(os.getenv("RESEARCH_COMPACT_TOKENS", "4000"))
+    return {"deep_research_compact": select_chunks(state.get("deep_research", ""), query, budget)}
+
+@memoize_node("segmentation", _SEGMENT_KEYS)
 def segment_node(state: AgentState):
     return segment_agent.analyze(state)
 
+@memoize_node("segmentation", _SEGMENT_KEYS)
+async def asegment_node(state: AgentState):
+    return await segment_agent.aanalyze(state)
+
+@memoize_node("competitors", _COMPETITOR_KEYS)
 def competitor_node(state: AgentState):
     return competitor_agent.analyze(state)
 
+@memoize_node("competitors", _COMPETITOR_KEYS)
+async def acompetitor_node(state: AgentState):
+    return await competitor_agent.aanalyze(state)
+
+def market_analysis_node(state: AgentState):
+    """
+    Segmentation and competitor analysis together, for callers that step through
+    nodes by hand (the UI) rather than running the graph's parallel branches.
+    """
+    return run_async(amarket_analysis_node(state))
+
+async def amarket_analysis_node(state: AgentState):
+    segments, competitors = await asyncio.gather(asegment_node(state), acompetitor_node(state))
+    errors = merge_errors(segments.get("errors"), competitors.get("errors"))
+    return {**segments, **competitors, "errors": errors}
+
+@memoize_node("strategy", _STRATEGY_KEYS)
 def strategy_node(state: AgentState):
     return strategy_agent.develop_strategy(state)
 
+@memoize_node("strategy", _STRATEGY_KEYS)
+async def astrategy_node(state: AgentState):
+    return await strategy_agent.adevelop_strategy(state)
+
 def campaign_node(state: AgentState):
     return campaign_agent.create_brief(state)
 
 def jtbd_node(state: AgentState):
     return jtbd_agent.analyze_jobs(state)
 
+def plan_node(state: AgentState):
+    return planner_agent.plan(state)
+
 # Graph Construction
 workflow = StateGraph(AgentState)
 
-workflow.add_node("inputs", input_node)
-workflow.add_node("research", research_node)
-workflow.add_node("segmentation", segment_node)
-workflow.add_node("competitors", competitor_node)
-workflow.add_node("strategy", strategy_node)
-workflow.add_node("campaign_briefing", campaign_node)
-workflow.add_node("jtbd_analysis", jtbd_node)
+workflow.add_node("inputs", RunnableLambda(input_node, ainput_node))
+# Sync and async implementations: app_graph.invoke uses the first, app_graph.ainvoke the second
+workflow.add_node("research", RunnableLambda(research_node, aresearch_node))
+workflow.add_node("compact_research", compact_research_node)
+workflow.add_node("segmentation", RunnableLambda(segment_node, asegment_node))
+workflow.add_node("competitors", RunnableLambda(competitor_node, acompetitor_node))
+workflow.add_node("strategy", RunnableLambda(strategy_node, astrategy_node))
+workflow.add_node("planning", plan_node)
 
 workflow.set_entry_point("inputs")
 workflow.add_edge("inputs", "research")
-workflow.add_edge("research", "segmentation")
-workflow.add_edge("segmentation", "competitors")
-workflow.add_edge("competitors", "strategy")
-workflow.add_edge("strategy", "campaign_briefing")
-workflow.add_edge("campaign_briefing", "jtbd_analysis")
-workflow.add_edge("jtbd_analysis", END)
+workflow.add_edge("research", "compact_research")
+# Segmentation and competitor analysis both only need the research, so they run in parallel
+workflow.add_edge("compact_research", "segmentation")
+workflow.add_edge("compact_research", "competitors")
+workflow.add_edge(["segmentation", "competitors"], "strategy")
+workflow.add_edge("strategy", "planning")
+workflow.add_edge("planning", END)
 
 # Compile Main Graph
 app_graph = workflow.compile()
 
+
+def run_batch(states: list, max_concurrency: int = None) -> list:
+    """
+    Runs the main graph for several companies at once. Runs share one event loop,
+    so their LLM calls overlap up to `max_concurrency` graphs (default LLM_CONCURRENCY).
+    """
+    limit = max_concurrency or int(os.getenv("LLM_CONCURRENCY", "20"))
+    return run_async(app_graph.abatch(states, config={"max_concurrency": limit}))
+
 # --- Generation Graph ---
 from agents.content_agent import ContentCreatorAgent
 from agents.promo_agent import PromotionalAgent
 from agents.reviewer_agent import ReviewerAgent
+from agents.campaign_writer_agent import CampaignWriterAgent
 
 content_agent = ContentCreatorAgent()
 promo_agent = PromotionalAgent()
 reviewer_agent = ReviewerAgent()
+campaign_writer_agent = CampaignWriterAgent()
 
 def content_node(state: AgentState):
-    return content_agent.batch_generate(state)
+    async def promoter(asset: dict) -> str:
+        promo = await promo_agent.agenerate_promo(asset, state.get("brand_voice", ""), state.get("brand_tone", ""))
+        return promo["promo_content"]
+
+    return content_agent.batch_generate(state, promoter=promoter)
 
 def promo_node(state: AgentState):
     return promo_agent.batch_promote(state)
@@ -101,6 +290,20 @@ def promo_node(state: AgentState):
 def review_node(state: AgentState):
     return reviewer_agent.review_campaign(state)
 
+def fused_node(state: AgentState):
+    """
+    Content, promo and review in one LLM call. Falls back to the three separate
+    nodes when the fused response is unusable (e.g. too many assets for one reply).
+    """
+    try:
+        return campaign_writer_agent.write_campaign(state)
+    except Exception as e:
+        print(f"Fused generation failed, falling back to content -> promotion -> review: {e}")
+    update = content_node(state)
+    apply_update(update, promo_node({**state, **update}))
+    apply_update(update, review_node({**state, **update}))
+    return update
+
 def increment_refinement(state: AgentState):
     count = state.get("refinement_count", 0)
     return {"refinement_count": count + 1}
@@ -139,3 +342,21 @@ gen_workflow.add_edge("increment_count", "content_creation")
 
 # Compile Generation Graph
 generation_graph = gen_workflow.compile()
+
+# Fused Generation Graph: one call per refinement loop instead of three
+fused_workflow = StateGraph(AgentState)
+fused_workflow.add_node("generation", fused_node)
+fused_workflow.add_node("increment_count", increment_refinement)
+
+fused_workflow.set_entry_point("generation")
+fused_workflow.add_conditional_edges(
+    "generation",
+    should_refine,
+    {
+        "refine": "increment_count",
+        "end": END
+    }
+)
+fused_workflow.add_edge("increment_count", "generation")
+
+fused_generation_graph = fused_workflow.compile()
@@ -1,4 +1,119 @@
+import asyncio
+import functools
+import importlib
 import os
+import threading
+import time
+from collections import deque
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+
+
+class RateLimiter:
+    """
+    Sliding-window limiter shared across worker threads. Callers only block
+    when issuing another request would exceed the provider's requests-per-minute
+    cap (LLM_RPM env var, 0 disables limiting).
+    """
+
+    def __init__(self, rpm: int = None, window: float = 60.0):
+        if rpm is None:
+            rpm = int(os.getenv("LLM_RPM", "50"))
+        self.rpm = rpm
+        self.window = window
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserve the next free slot and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and self._calls[0] <= now - self.window:
+                self._calls.popleft()
+            start = now
+            if len(self._calls) >= self.rpm:
+                start = max(now, self._calls[-self.rpm] + self.window)
+            self._calls.append(start)
+            return start - now
+
+    def acquire(self) -> None:
+        """Block until a request may be sent without exceeding the RPM cap."""
+        if self.rpm <= 0:
+            return
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self) -> None:
+        """Async variant of acquire() that yields to the event loop while waiting."""
+        if self.rpm <= 0:
+            return
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def get_provider() -> str:
+    """Returns the active provider name from the LLM_PROVIDER env var."""
+    return os.getenv("LLM_PROVIDER", "anthropic").lower().strip()
+
+
+# Anthropic allows at most 4 cache_control breakpoints per request
+_MAX_CACHE_BREAKPOINTS = 4
+
+
+def mark_cache_prefix(messages: list) -> list:
+    """
+    Marks the stable prompt prefix as cacheable. Agents keep their static
+    instructions in the system message, context that repeats across calls (strategy,
+    brief, research) in leading human messages, and the per-call data in the final
+    human message, so the prefix is byte-identical across calls. Anthropic needs an
+    explicit cache_control breakpoint; Gemini and OpenAI cache matching prefixes implicitly.
+    """
+    if get_provider() != "anthropic":
+        return messages
+    marked = []
+    breakpoints = 0
+    for i, m in enumerate(messages):
+        stable = isinstance(m, SystemMessage) or (isinstance(m, HumanMessage) and i < len(messages) - 1)
+        if stable and isinstance(m.content, str) and m.content.strip() and breakpoints < _MAX_CACHE_BREAKPOINTS:
+            m = type(m)(content=[{"type": "text", "text": m.content, "cache_control": {"type": "ephemeral"}}])
+            breakpoints += 1
+        marked.append(m)
+    return marked
+
+
+def _mark_cache_prefix(prompt_value):
+    return mark_cache_prefix(prompt_value.to_messages())
+
+
+def message_text(message) -> str:
+    """Text of a chat model response, whether its content is a string or content blocks."""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        block if isinstance(block, str) else block.get("text", "")
+        for block in message.content
+        if isinstance(block, str) or block.get("type") == "text"
+    )
+
+
+# Pipe between a ChatPromptTemplate and the model: prompt | cache_prefix | llm
+cache_prefix = RunnableLambda(_mark_cache_prefix)
+
+
+_DEFAULT_MODELS = {
+    "anthropic": ("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929"),
+    "google": ("GOOGLE_MODEL", "gemini-2.5-flash"),
+    "openai": ("OPENAI_MODEL", "gpt-4o"),
+}
+
+
+def get_model_name(provider: str = None) -> str:
+    """Returns the configured model name for a provider (defaults to the active one)."""
+    env_var, default = _DEFAULT_MODELS.get(provider or get_provider(), _DEFAULT_MODELS["anthropic"])
+    return os.getenv(env_var, default)
 
 
 def get_llm(temperature=0):
@@ -6,15 +121,51 @@ def get_llm(temperature=0):
     Centralized LLM factory. Reads LLM_PROVIDER env var at call time
     and returns the appropriate LangChain chat model.
 
+    Clients are memoized per (provider, model, temperature) so repeated calls
+    share one instance and its HTTP connection pool.
+
     Supported providers: anthropic, google, openai
     """
-    provider = os.getenv("LLM_PROVIDER", "anthropic").lower().strip()
+    provider = get_provider()
+    return _build_llm(provider, get_model_name(provider), float(temperature))
 
-    if provider == "google":
-        from langchain_google_genai import ChatGoogleGenerativeAI
 
-        return ChatGoogleGenerativeAI(
-            model=os.getenv("GOOGLE_MODEL", "gemini-2.5-flash"),
+def get_async_llm(temperature=0):
+    """
+    The model for async callers. LangChain chat models implement ainvoke/astream
+    on the same instance, so this shares get_llm's memoized client and pool.
+    """
+    return get_llm(temperature)
+
+
+# Provider integration packages: (module, class). Only the active provider's is imported.
+_CHAT_MODEL_CLASSES = {
+    "anthropic": ("langchain_anthropic", "ChatAnthropic"),
+    "google": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+    "openai": ("langchain_openai", "ChatOpenAI"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _chat_model_class(provider: str):
+    """Imports a provider's chat model class once, on first use."""
+    module_name, class_name = _CHAT_MODEL_CLASSES.get(provider, _CHAT_MODEL_CLASSES["anthropic"])
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(
+            f"LLM_PROVIDER '{provider}' needs the {module_name.replace('_', '-')} package"
+        ) from e
+    return getattr(module, class_name)
+
+
+@functools.lru_cache(maxsize=16)
+def _build_llm(provider: str, model: str, temperature: float):
+    chat_model = _chat_model_class(provider)
+
+    if provider == "google":
+        return chat_model(
+            model=model,
             temperature=temperature,
             google_api_key=os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"),
             max_retries=2,
@@ -22,10 +173,8 @@ def get_llm(temperature=0):
         )
 
     elif provider == "openai":
-        from langchain_openai import ChatOpenAI
-
-        return ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o"),
+        return chat_model(
+            model=model,
             temperature=temperature,
             api_key=os.getenv("OPENAI_API_KEY"),
             max_retries=2,
@@ -33,12 +182,12 @@ def get_llm(temperature=0):
         )
 
     else:  # default: anthropic
-        from langchain_anthropic import ChatAnthropic
-
-        return ChatAnthropic(
-            model=os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929"),
+        return chat_model(
+            model=model,
             temperature=temperature,
             anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
+            # The 1024-token default truncates long-form and multi-asset batched outputs
+            max_tokens=int(os.getenv("ANTHROPIC_MAX_TOKENS", "8192")),
             max_retries=2,
             timeout=120,
         )
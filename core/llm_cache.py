@@ -0,0 +1,93 @@
+import hashlib
+import orjson
+import os
+import tempfile
+
+from core.llm import get_model_name, get_provider
+
+_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of LLM responses. Each entry is a small JSON
+    file named by the SHA-256 of (provider, model, temperature, rendered messages).
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or os.getenv("LLM_CACHE_DIR", os.path.join(_ROOT_DIR, ".llm_cache"))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                return orjson.loads(f.read())["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, value) -> None:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file then rename so concurrent readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps({"value": value}))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            print(f"--- LLM cache write skipped: {e} ---")
+
+
+_cache = ResponseCache()
+
+
+def cache_enabled() -> bool:
+    return os.getenv("LLM_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+def cache_key(temperature: float, messages: list) -> str:
+    payload = {
+        "provider": get_provider(),
+        "model": get_model_name(),
+        "temperature": temperature,
+        "messages": [{"role": m.type, "content": m.content} for m in messages],
+    }
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def cached_invoke(prompt, chain, inputs: dict, temperature: float):
+    """
+    Invokes `chain` with `inputs`, serving repeat calls from the disk cache.
+    Only deterministic (temperature 0) calls are cached; `prompt` is the chain's
+    ChatPromptTemplate, used to render the exact messages for the cache key.
+    """
+    if temperature != 0 or not cache_enabled():
+        return chain.invoke(inputs)
+
+    key = cache_key(temperature, prompt.format_messages(**inputs))
+    hit = _cache.get(key)
+    if hit is not None:
+        print("--- LLM cache hit ---")
+        return hit
+
+    result = chain.invoke(inputs)
+    _cache.set(key, result)
+    return result
+
+
+async def acached_invoke(prompt, chain, inputs: dict, temperature: float):
+    """Async counterpart of cached_invoke."""
+    if temperature != 0 or not cache_enabled():
+        return await chain.ainvoke(inputs)
+
+    key = cache_key(temperature, prompt.format_messages(**inputs))
+    hit = _cache.get(key)
+    if hit is not None:
+        print("--- LLM cache hit ---")
+        return hit
+
+    result = await chain.ainvoke(inputs)
+    _cache.set(key, result)
+    return result
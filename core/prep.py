@@ -0,0 +1,107 @@
+import math
+import re
+from collections import Counter
+
+# Rough chars-per-token ratio for English prose across the supported providers
+CHARS_PER_TOKEN = 4
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_HEADING_RE = re.compile(r"^#{1,6}\s", re.M)
+# Cut points for paragraphs longer than a chunk, coarsest first: lines, sentences, words
+_SPLITTERS = (
+    (re.compile(r"\n"), "\n"),
+    (re.compile(r"(?<=[.!?])\s+"), " "),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def _terms(text: str) -> list:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _split_long(text: str, max_chars: int, level: int = 0) -> list:
+    """
+    Pieces of `text` no longer than `max_chars`, cut at line breaks, then sentence
+    ends, then whitespace; a single unbroken run is sliced as a last resort.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(_SPLITTERS):
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    pattern, joiner = _SPLITTERS[level]
+    pieces, current = [], ""
+    for part in pattern.split(text):
+        if not part:
+            continue
+        if len(part) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.extend(_split_long(part, max_chars, level + 1))
+            continue
+        if current and len(current) + len(part) + len(joiner) > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}{joiner}{part}" if current else part
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_chunks(text: str, max_chars: int = 2000) -> list:
+    """
+    Splits markdown/plain text into paragraph-level chunks at blank lines and
+    headings, merging short paragraphs up to `max_chars` so chunks end on
+    paragraph boundaries instead of mid-sentence.
+    """
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", _HEADING_RE.sub(lambda m: "\n\n" + m.group(0), text))]
+    chunks, current = [], ""
+    for para in (piece for p in paragraphs if p for piece in _split_long(p, max_chars)):
+        if current and (len(current) + len(para) + 2 > max_chars or _HEADING_RE.match(para)):
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{para}" if current else para
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def select_chunks(text: str, query: str, budget_tokens: int = 12000) -> str:
+    """
+    Returns the chunks of `text` most relevant to `query` (TF-IDF cosine), packed
+    up to `budget_tokens` and re-joined in their original order. Text already
+    within budget is returned unchanged.
+    """
+    budget_chars = budget_tokens * CHARS_PER_TOKEN
+    if len(text) <= budget_chars:
+        return text
+
+    chunks = split_chunks(text)
+    chunk_terms = [Counter(_terms(c)) for c in chunks]
+    doc_freq = Counter(term for terms in chunk_terms for term in terms)
+    n = len(chunks)
+    idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in doc_freq.items()}
+
+    query_terms = Counter(_terms(query))
+    q_vec = {t: c * idf.get(t, 0.0) for t, c in query_terms.items()}
+    q_norm = math.sqrt(sum(v * v for v in q_vec.values())) or 1.0
+
+    scores = []
+    for i, terms in enumerate(chunk_terms):
+        vec = {t: c * idf[t] for t, c in terms.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        dot = sum(w * vec.get(t, 0.0) for t, w in q_vec.items())
+        # Earlier chunks (page intro, hero copy) break ties
+        scores.append((dot / (norm * q_norm), -i))
+
+    selected, used = [], 0
+    for _, neg_i in sorted(scores, reverse=True):
+        size = len(chunks[-neg_i]) + 2
+        if used + size > budget_chars:
+            continue
+        selected.append(-neg_i)
+        used += size
+    if not selected:
+        # Budget smaller than any chunk: keep the leading text, as before chunking
+        return text[:budget_chars]
+    return "\n\n".join(chunks[i] for i in sorted(selected))
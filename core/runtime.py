@@ -0,0 +1,28 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import uvloop
+except ImportError:  # optional: not available on Windows
+    uvloop = None
+
+
+def _run(coro):
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+
+def run(coro):
+    """
+    Runs a coroutine to completion from synchronous code, on uvloop when it is
+    installed. If the caller is already inside an event loop (e.g. an async graph
+    invocation), the coroutine runs on its own loop in a worker thread instead
+    of failing with "asyncio.run() cannot be called from a running event loop".
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_run, coro).result()
@@ -0,0 +1,53 @@
+import json
+import re
+
+import orjson
+from langchain_core.output_parsers import JsonOutputParser
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.S)
+# Reads one JSON value from an offset and ignores what follows; strict=False accepts
+# raw newlines/tabs inside strings, which models emit in long Markdown values
+_DECODER = json.JSONDecoder(strict=False)
+
+
+def to_json(obj) -> str:
+    """
+    Compact, key-sorted JSON for embedding structured state in prompts. Unlike str(),
+    the output is byte-identical for equal inputs, which keeps provider prompt-cache
+    prefixes stable and avoids Python-repr tokens (single quotes, None).
+    """
+    return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str).decode("utf-8")
+
+
+def parse_json(text: str):
+    """
+    Decodes a model's JSON reply, tolerating a surrounding markdown code fence or
+    prose around a single JSON object. CPU-bound on long replies, so async callers
+    run it via asyncio.to_thread.
+    """
+    text = text.strip()
+    fenced = _FENCE_RE.match(text)
+    try:
+        return orjson.loads(fenced.group(1) if fenced else text)
+    except orjson.JSONDecodeError:
+        # JSON wrapped in prose: decode the object at the first brace in one linear pass
+        start = text.find("{")
+        if start < 0:
+            raise
+        return _DECODER.raw_decode(text, start)[0]
+
+
+class FastJsonOutputParser(JsonOutputParser):
+    """
+    JsonOutputParser that decodes complete responses with orjson. Partial
+    (streaming) parses and responses orjson rejects, e.g. raw control
+    characters inside strings, fall back to the lenient LangChain parser.
+    """
+
+    def parse_result(self, result, *, partial: bool = False):
+        if not partial:
+            try:
+                return parse_json(result[0].text)
+            except ValueError:
+                pass
+        return super().parse_result(result, partial=partial)
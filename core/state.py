@@ -1,12 +1,28 @@
-from typing import TypedDict, List, Optional, Dict, Any
+from typing import TypedDict, List, Optional, Dict, Any, Annotated, Tuple
 from langgraph.graph.message import add_messages
 from langchain_core.messages import BaseMessage
 
+def merge_errors(existing: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reducer for `errors`: each node returns only the errors it raised, which are
+    appended, so no node copies (or re-sends) the errors accumulated before it.
+    """
+    return (existing or []) + (new or [])
+
+def apply_update(state: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Applies a node's return value to a state dict managed outside the graph (the UI
+    steps through nodes by hand) the way the graph would: errors are appended.
+    """
+    for key, value in update.items():
+        state[key] = merge_errors(state.get(key), value) if key == "errors" else value
+    return state
+
 class AgentState(TypedDict):
     # Inputs
     company_name: str
     company_url: str
-    uploaded_files: List[str]
+    uploaded_file_bytes: List[Tuple[str, Any]]  # (filename, bytes or memoryview) per upload
     
     # Raw Data
     raw_web_content: str
@@ -14,6 +30,7 @@ class AgentState(TypedDict):
     
     # Analysis Outputs
     deep_research: str
+    deep_research_compact: str  # deep_research bounded for downstream prompts (compact_research node)
     segments: List[Dict[str, Any]]
     personas: List[Dict[str, Any]]
     competitor_analysis: str
@@ -36,11 +53,12 @@ class AgentState(TypedDict):
     messaging_pillars: List[str]  # Key messaging themes
 
     # Error Tracking
-    errors: List[Dict[str, Any]]  # [{agent_name, error_type, message, recoverable}]
+    errors: Annotated[List[Dict[str, Any]], merge_errors]  # [{agent_name, error_type, message, recoverable}]
 
     # Configurable Settings
     refinement_threshold: int  # Quality score threshold (default 80)
     max_refinements: int       # Max refinement loops (default 2)
+    batch_mode: str            # "async" = generate content via the provider batch API (non-interactive runs)
 
     # Messages for chat history if needed
     messages: List[BaseMessage]
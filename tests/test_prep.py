@@ -0,0 +1,21 @@
+from core.prep import CHARS_PER_TOKEN, select_chunks, split_chunks
+
+
+def test_split_chunks_splits_paragraph_longer_than_max_chars():
+    text = "\n".join(f"Line {i} about pricing." for i in range(500))
+    chunks = split_chunks(text, max_chars=500)
+    assert len(chunks) > 1
+    assert all(len(c) <= 500 for c in chunks)
+    assert all(not c.startswith(" ") for c in chunks)
+
+
+def test_select_chunks_keeps_text_without_blank_lines():
+    text = "word " * 20000
+    selected = select_chunks(text, "word", 5000)
+    assert selected
+    assert len(selected) <= 5000 * CHARS_PER_TOKEN
+
+
+def test_select_chunks_falls_back_to_prefix_when_no_chunk_fits():
+    text = "x" * 100000
+    assert select_chunks(text, "query", 10) == text[: 10 * CHARS_PER_TOKEN]
@@ -1,13 +1,18 @@
-import json
+import hashlib
 import io
+import orjson
 import re
+import secrets
 import os
+import dbm
 import sys
+import threading
 import time
 import zipfile
+import pandas as pd
 import streamlit as st
 from datetime import datetime
-from dotenv import load_dotenv
+from packaging.version import Version
 
 
 # ---------------------------------------------------------------------------
@@ -17,20 +22,179 @@ from dotenv import load_dotenv
 ALLOWED_EXTENSIONS = {".pdf", ".docx", ".doc", ".txt", ".md"}
 MAX_FILE_SIZE_MB = 10
 MIN_ACTION_INTERVAL_SECONDS = 30  # Cooldown between major LLM operations
+SNAPSHOT_TTL_SECONDS = 7 * 24 * 3600  # Save/Restore State snapshots are pruned after a week
+
+# Manifest editor asset types; interned so every manifest row shares one string per type
+ASSET_TYPE_OPTIONS = tuple(
+    sys.intern(t)
+    for t in (
+        "Blog Post",
+        "LinkedIn Post",
+        "Email Sequence",
+        "Whitepaper",
+        "Case Study",
+        "Webinar Script",
+        "Landing Page",
+    )
+)
+_TYPE_INDEX = {t: i for i, t in enumerate(ASSET_TYPE_OPTIONS)}
+
+# Free-text asset types from the planner -> manifest editor options, first match wins
+_ASSET_TYPE_KEYWORDS = (
+    ("whitepaper", "Whitepaper"),
+    ("linkedin", "LinkedIn Post"),
+    ("email", "Email Sequence"),
+    ("blog", "Blog Post"),
+    ("webinar", "Webinar Script"),
+    ("case", "Case Study"),
+    ("landing", "Landing Page"),
+)
+
+# Streamlit 1.52+ builds download_button data lazily from a callable
+_DEFERRED_DOWNLOADS = Version(st.__version__) >= Version("1.52.0")
+
+# Research report lines dropped from the displayed report
+_REPORT_METADATA_PREFIXES = ("Analyst:", "Source Data:", "Focus:")
+
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r"[^a-zA-Z0-9_\-.]")
+# Export file and ZIP entry names
+_SLUG_RE = re.compile(r"[^a-zA-Z0-9_]")
+_STRIP_SEPARATORS = str.maketrans("", "", "/\\")
 
 
 def sanitize_filename(name):
     """Sanitize uploaded filename to prevent path traversal."""
-    # Strip directory separators
-    name = name.replace("/", "").replace("\\", "")
-    # Strip leading dots
-    name = name.lstrip(".")
+    # Strip directory separators, then leading dots
+    name = name.translate(_STRIP_SEPARATORS).lstrip(".")
     # Keep only safe characters
-    name = re.sub(r"[^a-zA-Z0-9_\-.]", "_", name)
+    name = _UNSAFE_FILENAME_CHARS_RE.sub("_", name)
     # Limit length
     return name[:255] if name else "unnamed_file"
 
 
+def deferred_download(build):
+    """
+    Download data built only when the button is clicked (where Streamlit accepts a
+    callable, run off the script thread); older versions get it built eagerly.
+    """
+    return build if _DEFERRED_DOWNLOADS else build()
+
+
+def _set_state(**values):
+    """on_click callback: sets session_state keys before the rerun the click already triggers."""
+    st.session_state.update(values)
+
+
+def _reset_manifest_selection():
+    """
+    Drops the content plan's row selection and editor state, so a replaced manifest
+    starts with every row selected instead of inheriting the previous plan's choices.
+    """
+    for key in ("manifest_selections", "manifest_editor", "_manifest_plan"):
+        st.session_state.pop(key, None)
+
+
+def _save_edit(result_key, editor_key, flag_key):
+    """on_click callback: stores an editor's text in workflow_results and leaves edit mode."""
+    st.session_state["workflow_results"][result_key] = st.session_state[editor_key]
+    st.session_state[flag_key] = False
+
+
+def _save_asset(i, editor_key, flag_key):
+    """on_click callback: stores an edited asset body and leaves edit mode."""
+    st.session_state["workflow_results"]["generated_assets"][i]["content"] = st.session_state[editor_key]
+    st.session_state[flag_key] = False
+
+
+def _state_exporter(results):
+    """Callable that serializes campaign state for export; uploaded file contents are left out."""
+    def build():
+        return orjson.dumps(
+            {k: v for k, v in results.items() if k != "uploaded_file_bytes"},
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+        )
+    return build
+
+
+def _memoized_export(kind, payload, build):
+    """
+    `build` wrapped to return its previous output while `payload` is unchanged (compared
+    by BLAKE2b digest), so repeat downloads of the same campaign skip the rebuild. The
+    cache dict is bound here because deferred builds run outside the script thread.
+    """
+    cache = st.session_state.setdefault("_export_cache", {})
+
+    def cached_build():
+        digest = hashlib.blake2b(
+            orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS),
+            digest_size=16,
+        ).digest()
+        hit = cache.get(kind)
+        if hit and hit[0] == digest:
+            return hit[1]
+        data = build()
+        cache[kind] = (digest, data)
+        return data
+    return cached_build
+
+
+def _docx_exporter(results):
+    """Callable that builds the campaign DOCX report."""
+    def build():
+        from utils.docx_generator import generate_campaign_docx_bytes
+
+        # Level 3, as for the Markdown ZIP: near level-1 speed at close to the default size
+        return generate_campaign_docx_bytes(results, level=3).getvalue()
+    return build
+
+
+def _zip_exporter(assets):
+    """Callable that builds a ZIP with one Markdown file per asset (promotional materials appended)."""
+    def build():
+        zip_buffer = io.BytesIO()
+        # Level 3: near level-1 speed, within ~5% of the default level's size on Markdown
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=3) as zf:
+            for i, asset in enumerate(assets):
+                title = _SLUG_RE.sub("_", asset.get("title", f"asset_{i}"))
+                promo = asset.get("promotional_materials", "")
+                # Written piecewise into the entry, without concatenating content and promo first
+                with zf.open(f"{title}.md", "w") as entry:
+                    entry.write(asset.get("content", "").encode("utf-8"))
+                    if promo:
+                        entry.write(b"\n\n---\n\n## Promotional Materials\n\n")
+                        entry.write(promo.encode("utf-8"))
+        return zip_buffer.getvalue()
+    return build
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _clean_report(research_content: str, competitor_table: str) -> str:
+    """Research report without analyst metadata lines, plus the competitor section."""
+    report = "\n".join(
+        line for line in research_content.splitlines() if not line.lstrip().startswith(_REPORT_METADATA_PREFIXES)
+    )
+    if competitor_table:
+        report += "\n\n## 5. Competitive Positioning Analysis\n" + competitor_table
+    return report
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _format_brief(brief) -> str:
+    """Campaign brief as Markdown "**Key**: value" paragraphs (an edited brief is already text)."""
+    if not isinstance(brief, dict):
+        return str(brief)
+    return "\n\n".join(
+        f"**{k.replace('_', ' ').title()}**: " + (", ".join(map(str, v)) if isinstance(v, list) else str(v))
+        for k, v in brief.items()
+    )
+
+
+def _today_stamp() -> str:
+    """YYYYMMDD for download file names."""
+    return datetime.now().strftime("%Y%m%d")
+
+
 def safe_markdown(content, max_length=100000):
     """Safely render markdown with length guard."""
     if not content:
@@ -60,23 +224,130 @@ def check_rate_limit(action_key: str) -> bool:
 # ---------------------------------------------------------------------------
 
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-sys.path.insert(0, root_dir)
-
-# Secret Handling for Cloud vs Local
-try:
-    if "GOOGLE_API_KEY" in st.secrets:
-        os.environ["GOOGLE_API_KEY"] = st.secrets["GOOGLE_API_KEY"]
-    if "ANTHROPIC_API_KEY" in st.secrets:
-        os.environ["ANTHROPIC_API_KEY"] = st.secrets["ANTHROPIC_API_KEY"]
-    if "TAVILY_API_KEY" in st.secrets:
-        os.environ["TAVILY_API_KEY"] = st.secrets["TAVILY_API_KEY"]
-except FileNotFoundError:
-    pass  # No secrets.toml -- fall through to .env loading below
-
-# Load env locally (explicit path to ensure it is found)
-env_path = os.path.join(root_dir, ".env")
-if os.path.exists(env_path):
-    load_dotenv(dotenv_path=env_path, override=True)
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from core.env import load_env
+from core.serialize import to_json
+from core.state import apply_update
+
+
+@st.cache_resource(show_spinner=False)
+def _bootstrap_env():
+    """Secrets (cloud) then the project-root .env (local) into os.environ, once per process."""
+    # Secret Handling for Cloud vs Local
+    try:
+        for key in ("GOOGLE_API_KEY", "ANTHROPIC_API_KEY", "TAVILY_API_KEY"):
+            if key in st.secrets:
+                os.environ[key] = st.secrets[key]
+    except FileNotFoundError:
+        pass  # No secrets.toml -- fall through to .env loading below
+
+    load_env()
+
+
+_bootstrap_env()
+
+
+@st.cache_resource(show_spinner=False)
+def _graph():
+    """core.graph, imported once per server process (it builds every agent and both graphs)."""
+    import core.graph
+
+    return core.graph
+
+
+@st.cache_resource(show_spinner=False)
+def _state_store():
+    """dbm file of JSON workflow_results snapshots for Save/Restore State, and the lock guarding it."""
+    return dbm.open(os.path.join(root_dir, ".imc_state"), "c"), threading.Lock()
+
+
+def _snapshot_expired(record: dict) -> bool:
+    """True for a snapshot record older than SNAPSHOT_TTL_SECONDS."""
+    return time.time() - record.get("saved_at", 0) > SNAPSHOT_TTL_SECONDS
+
+
+def _save_snapshot():
+    """
+    on_click callback: stores workflow_results under a fresh unguessable token kept in the
+    page URL, replacing this page's previous snapshot and dropping expired ones.
+    """
+    previous = st.query_params.get("snapshot")
+    token = secrets.token_urlsafe(32)
+    # Uploaded file views belong to this session's uploader and are not serializable
+    results = {k: v for k, v in st.session_state["workflow_results"].items() if k != "uploaded_file_bytes"}
+    record = to_json({"saved_at": time.time(), "results": results}).encode("utf-8")
+    store, lock = _state_store()
+    with lock:
+        expired = [k for k in store.keys() if _snapshot_expired(orjson.loads(store[k]))]
+        for key in expired + ([previous.encode("utf-8")] if previous else []):
+            if key in store:
+                del store[key]
+        store[token] = record
+        if hasattr(store, "sync"):
+            store.sync()
+    st.query_params["snapshot"] = token
+
+
+def _restore_snapshot():
+    """on_click callback: replaces workflow_results with the unexpired snapshot saved for this page URL."""
+    store, lock = _state_store()
+    with lock:
+        data = store.get(st.query_params.get("snapshot", ""))
+    record = orjson.loads(data) if data is not None else None
+    if record is None or _snapshot_expired(record):
+        st.session_state["_snapshot_missing"] = True
+        return
+    st.session_state["workflow_results"] = record["results"]
+    _reset_manifest_selection()
+
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _cached_inputs(
+    company_url: str, upload_digests: tuple, data_dir_stamp: tuple, _uploaded_file_bytes: list
+) -> dict:
+    """
+    input_node per URL and uploaded file contents, so repeat runs skip the scrape.
+    Keyed on the uploads' SHA-256 digests, or without uploads on the data dir listing
+    input_node loads instead; the (unhashed) file views are only read on a miss.
+    """
+    return _graph().input_node({"company_url": company_url, "uploaded_file_bytes": _uploaded_file_bytes})
+
+
+def _data_dir_stamp() -> tuple:
+    """(name, size, mtime) of each entry in input_node's data dir, so edits there miss the cache."""
+    try:
+        with os.scandir(_graph().DATA_DIR) as entries:
+            return tuple(sorted((e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in entries))
+    except OSError:
+        return ()
+
+
+def _inputs(company_url: str, upload_digests: tuple, uploaded_file_bytes: list) -> dict:
+    """Cached inputs; a failed scrape is evicted so the next run retries it."""
+    args = (company_url, upload_digests, () if upload_digests else _data_dir_stamp(), uploaded_file_bytes)
+    result = _cached_inputs(*args)
+    if result.get("errors"):
+        _cached_inputs.clear(*args)
+    return result
+
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _cached_research(raw_web_content: str, raw_doc_content: str) -> dict:
+    """research_node per scraped/loaded input; failed runs are evicted so they are retried."""
+    return _graph().research_node({"raw_web_content": raw_web_content, "raw_doc_content": raw_doc_content})
+
+
+def _research(state: dict, force: bool = False) -> dict:
+    """Cached research for a state; `force` drops the cached entry first (Re-run Research)."""
+    args = (state.get("raw_web_content", ""), state.get("raw_doc_content", ""))
+    if force:
+        _cached_research.clear(*args)
+    result = _cached_research(*args)
+    if result.get("errors"):
+        _cached_research.clear(*args)
+    return result
 
 st.set_page_config(page_title="Integrated Marketing Campaigns", layout="wide", page_icon="IMC")
 
@@ -384,14 +655,43 @@ with st.sidebar:
 
     # Save campaign state
     if st.session_state.get("workflow_results"):
-        campaign_json = json.dumps(st.session_state["workflow_results"], default=str, indent=2)
         st.download_button(
             label="Export Campaign State",
-            data=campaign_json,
-            file_name=f"campaign_{st.session_state['workflow_results'].get('company_name', 'draft')}_{datetime.now().strftime('%Y%m%d')}.json",
+            data=deferred_download(_state_exporter(st.session_state["workflow_results"])),
+            file_name=f"campaign_{st.session_state['workflow_results'].get('company_name', 'draft')}_{_today_stamp()}.json",
             mime="application/json",
         )
 
+    # Server-side snapshot: survives a page reload (its token is in the URL)
+    col_save_state, col_restore_state = st.columns(2)
+    with col_save_state:
+        st.button(
+            "Save State", key="save_snapshot", on_click=_save_snapshot,
+            disabled=not st.session_state.get("workflow_results"),
+        )
+    with col_restore_state:
+        st.button(
+            "Restore State", key="restore_snapshot", on_click=_restore_snapshot,
+            disabled="snapshot" not in st.query_params,
+        )
+    if st.session_state.pop("_snapshot_missing", False):
+        st.warning("No saved state for this link (snapshots expire after a week).")
+
+    # Load campaign state
+    loaded_state = st.file_uploader("Import Campaign State", type=["json"], key="import_state")
+    if loaded_state is not None and st.session_state.get("_imported_state_id") != loaded_state.file_id:
+        try:
+            # getvalue() is already bytes, which orjson parses without decoding to str first
+            imported = orjson.loads(loaded_state.getvalue())
+            if not isinstance(imported, dict):
+                raise ValueError("expected a JSON object")
+            st.session_state["workflow_results"] = imported
+            _reset_manifest_selection()
+            st.session_state["_imported_state_id"] = loaded_state.file_id
+            st.success("Campaign state imported.")
+        except (orjson.JSONDecodeError, ValueError) as e:
+            st.error(f"Could not import campaign state: {e}")
+
     # Version badge at bottom of sidebar
     from core import __version__
     st.divider()
@@ -412,7 +712,8 @@ if "workflow_results" not in st.session_state:
 # Tab 1 -- Research
 # ---------------------------------------------------------------------------
 
-with tab1:
+@st.fragment
+def _research_tab():
     st.header("Deep Research")
 
     if "edit_research" not in st.session_state:
@@ -427,18 +728,11 @@ with tab1:
             with st.status("Running Research Phase...", expanded=True) as status:
                 try:
                     st.write("Loading AI agents (first run may take a moment)...")
-                    from core.graph import (
-                        input_node,
-                        research_node,
-                        segment_node,
-                        competitor_node,
-                        strategy_node,
-                        campaign_node,
-                        jtbd_node,
-                    )
+                    graph = _graph()
 
                     # Handle file uploads - store in session as bytes
                     uploaded_file_data = []
+                    upload_digests = []
                     if uploaded_files:
                         for uf in uploaded_files:
                             if uf.size > MAX_FILE_SIZE_MB * 1024 * 1024:
@@ -449,13 +743,15 @@ with tab1:
                             if ext not in ALLOWED_EXTENSIONS:
                                 st.warning(f"Skipping {uf.name}: unsupported file type")
                                 continue
-                            uploaded_file_data.append((safe_name, uf.getvalue()))
+                            # View over the uploader's own buffer: no bytes copy, hashed in place
+                            view = uf.getbuffer()
+                            uploaded_file_data.append((safe_name, view))
+                            upload_digests.append((safe_name, hashlib.sha256(view).hexdigest()))
                         st.info(f"Loaded {len(uploaded_file_data)} documents for context.")
 
                     # Build initial state
                     current_state = {
                         "company_url": company_url,
-                        "uploaded_files": [f[0] for f in uploaded_file_data],
                         "uploaded_file_bytes": uploaded_file_data,
                         "brand_voice": brand_voice,
                         "brand_tone": brand_tone,
@@ -467,39 +763,28 @@ with tab1:
 
                     # Step-by-step execution with progress
                     st.write("Scraping company website...")
-                    result = input_node(current_state)
-                    current_state.update(result)
+                    result = _inputs(company_url, tuple(upload_digests), uploaded_file_data)
+                    apply_update(current_state, result)
 
                     st.write("Analyzing company identity and value proposition...")
-                    result = research_node(current_state)
-                    current_state.update(result)
-                    time.sleep(1)
+                    result = _research(current_state)
+                    apply_update(current_state, result)
+                    current_state.update(graph.compact_research_node(current_state))
 
-                    st.write("Identifying market segments and personas...")
-                    result = segment_node(current_state)
-                    current_state.update(result)
-                    time.sleep(1)
-
-                    st.write("Analyzing competitive landscape...")
-                    result = competitor_node(current_state)
-                    current_state.update(result)
-                    time.sleep(1)
+                    st.write("Identifying market segments and analyzing competitive landscape...")
+                    result = graph.market_analysis_node(current_state)
+                    apply_update(current_state, result)
 
                     st.write("Developing positioning and messaging strategy...")
-                    result = strategy_node(current_state)
-                    current_state.update(result)
-                    time.sleep(1)
-
-                    st.write("Creating campaign brief...")
-                    result = campaign_node(current_state)
-                    current_state.update(result)
-                    time.sleep(1)
+                    result = graph.strategy_node(current_state)
+                    apply_update(current_state, result)
 
-                    st.write("Mapping Jobs-to-be-Done and content plan...")
-                    result = jtbd_node(current_state)
-                    current_state.update(result)
+                    st.write("Creating campaign brief and Jobs-to-be-Done content plan...")
+                    result = graph.plan_node(current_state)
+                    apply_update(current_state, result)
 
                     st.session_state["workflow_results"] = current_state
+                    _reset_manifest_selection()
                     status.update(label="Research Complete!", state="complete")
 
                     # Show any errors
@@ -524,18 +809,17 @@ with tab1:
                     if st.button("Confirm", key="confirm_rerun_research_yes") and check_rate_limit("rerun_research"):
                         st.session_state[confirm_key] = False
                         with st.spinner("Re-analyzing..."):
-                            from core.graph import research_node
-                            result = research_node(results)
-                            st.session_state["workflow_results"].update(result)
+                            graph = _graph()
+                            result = _research(results, force=True)
+                            apply_update(st.session_state["workflow_results"], result)
+                            st.session_state["workflow_results"].update(
+                                graph.compact_research_node(st.session_state["workflow_results"])
+                            )
                             st.rerun()
                 with c2:
-                    if st.button("Cancel", key="confirm_rerun_research_no"):
-                        st.session_state[confirm_key] = False
-                        st.rerun()
+                    st.button("Cancel", key="confirm_rerun_research_no", on_click=_set_state, kwargs={confirm_key: False})
             else:
-                if st.button("Re-run Research", key="rerun_research"):
-                    st.session_state[confirm_key] = True
-                    st.rerun()
+                st.button("Re-run Research", key="rerun_research", on_click=_set_state, kwargs={confirm_key: True})
         with col_rerun2:
             confirm_key = "_confirm_rerun_competitors"
             if st.session_state.get(confirm_key):
@@ -545,31 +829,20 @@ with tab1:
                     if st.button("Confirm", key="confirm_rerun_comp_yes") and check_rate_limit("rerun_competitors"):
                         st.session_state[confirm_key] = False
                         with st.spinner("Re-analyzing competitors..."):
-                            from core.graph import competitor_node
-                            result = competitor_node(results)
-                            st.session_state["workflow_results"].update(result)
+                            graph = _graph()
+                            graph.invalidate("competitors")
+                            result = graph.competitor_node(results)
+                            apply_update(st.session_state["workflow_results"], result)
                             st.rerun()
                 with c2:
-                    if st.button("Cancel", key="confirm_rerun_comp_no"):
-                        st.session_state[confirm_key] = False
-                        st.rerun()
+                    st.button("Cancel", key="confirm_rerun_comp_no", on_click=_set_state, kwargs={confirm_key: False})
 
     # Display Results
     research_content = results.get("deep_research", "")
     competitor_table = results.get("competitor_analysis", "")
 
     if research_content:
-        lines = research_content.split("\n")
-        cleaned_lines = [
-            line
-            for line in lines
-            if not line.strip().startswith(("Analyst:", "Source Data:", "Focus:"))
-        ]
-        clean_research = "\n".join(cleaned_lines)
-
-        full_report = clean_research
-        if competitor_table:
-            full_report += "\n\n## 5. Competitive Positioning Analysis\n" + competitor_table
+        full_report = _clean_report(research_content, competitor_table)
 
         st.subheader(f"Company Analysis: {results.get('company_name', '')}")
 
@@ -580,27 +853,32 @@ with tab1:
             col_save, col_cancel = st.columns([1, 4])
             with col_save:
                 if st.button("Save Report", key="save_research"):
+                    graph = _graph()
                     st.session_state["workflow_results"]["deep_research"] = updated_report
+                    st.session_state["workflow_results"].update(
+                        graph.compact_research_node(st.session_state["workflow_results"])
+                    )
                     st.session_state["workflow_results"]["competitor_analysis"] = ""
                     st.session_state["edit_research"] = False
                     st.rerun()
             with col_cancel:
-                if st.button("Cancel", key="cancel_research"):
-                    st.session_state["edit_research"] = False
-                    st.rerun()
+                st.button("Cancel", key="cancel_research", on_click=_set_state, kwargs={"edit_research": False})
         else:
             safe_markdown(full_report)
             st.caption("Review the full report above. Click edit to refine.")
-            if st.button("Edit Report", key="edit_research_btn"):
-                st.session_state["edit_research"] = True
-                st.rerun()
+            st.button("Edit Report", key="edit_research_btn", on_click=_set_state, kwargs={"edit_research": True})
+
+
+with tab1:
+    _research_tab()
 
 
 # ---------------------------------------------------------------------------
 # Tab 2 -- Strategy & Segmentation
 # ---------------------------------------------------------------------------
 
-with tab2:
+@st.fragment
+def _strategy_tab():
     st.header("Strategy & Segmentation")
     results = st.session_state.get("workflow_results", {})
 
@@ -619,18 +897,15 @@ with tab2:
                     if st.button("Confirm", key="confirm_rerun_seg_yes") and check_rate_limit("rerun_segmentation"):
                         st.session_state[confirm_key] = False
                         with st.spinner("Re-analyzing segments..."):
-                            from core.graph import segment_node
-                            result = segment_node(results)
-                            st.session_state["workflow_results"].update(result)
+                            graph = _graph()
+                            graph.invalidate("segmentation")
+                            result = graph.segment_node(results)
+                            apply_update(st.session_state["workflow_results"], result)
                             st.rerun()
                 with c2:
-                    if st.button("Cancel", key="confirm_rerun_seg_no"):
-                        st.session_state[confirm_key] = False
-                        st.rerun()
+                    st.button("Cancel", key="confirm_rerun_seg_no", on_click=_set_state, kwargs={confirm_key: False})
             else:
-                if st.button("Re-run Segmentation", key="rerun_segmentation"):
-                    st.session_state[confirm_key] = True
-                    st.rerun()
+                st.button("Re-run Segmentation", key="rerun_segmentation", on_click=_set_state, kwargs={confirm_key: True})
         with col_r2:
             confirm_key = "_confirm_rerun_strategy"
             if st.session_state.get(confirm_key):
@@ -640,14 +915,13 @@ with tab2:
                     if st.button("Confirm", key="confirm_rerun_strat_yes") and check_rate_limit("rerun_strategy"):
                         st.session_state[confirm_key] = False
                         with st.spinner("Re-developing strategy..."):
-                            from core.graph import strategy_node
-                            result = strategy_node(results)
-                            st.session_state["workflow_results"].update(result)
+                            graph = _graph()
+                            graph.invalidate("strategy")
+                            result = graph.strategy_node(results)
+                            apply_update(st.session_state["workflow_results"], result)
                             st.rerun()
                 with c2:
-                    if st.button("Cancel", key="confirm_rerun_strat_no"):
-                        st.session_state[confirm_key] = False
-                        st.rerun()
+                    st.button("Cancel", key="confirm_rerun_strat_no", on_click=_set_state, kwargs={confirm_key: False})
 
     # Segments display
     if results.get("segments"):
@@ -671,32 +945,33 @@ with tab2:
         current_strategy = results["strategy_framework"]
 
         if st.session_state["edit_strategy"]:
-            updated_strategy = st.text_area(
+            st.text_area(
                 "Edit Strategy Content", value=current_strategy, height=600, key="strategy_editor"
             )
             col_save, col_cancel = st.columns([1, 4])
             with col_save:
-                if st.button("Save Strategy", key="save_strategy"):
-                    st.session_state["workflow_results"]["strategy_framework"] = updated_strategy
-                    st.session_state["edit_strategy"] = False
-                    st.rerun()
+                st.button(
+                    "Save Strategy", key="save_strategy", on_click=_save_edit,
+                    args=("strategy_framework", "strategy_editor", "edit_strategy"),
+                )
             with col_cancel:
-                if st.button("Cancel", key="cancel_strategy"):
-                    st.session_state["edit_strategy"] = False
-                    st.rerun()
+                st.button("Cancel", key="cancel_strategy", on_click=_set_state, kwargs={"edit_strategy": False})
         else:
             safe_markdown(current_strategy)
             st.caption("Review the strategy above. Click edit to make changes.")
-            if st.button("Edit Strategy", key="edit_strategy_btn"):
-                st.session_state["edit_strategy"] = True
-                st.rerun()
+            st.button("Edit Strategy", key="edit_strategy_btn", on_click=_set_state, kwargs={"edit_strategy": True})
+
+
+with tab2:
+    _strategy_tab()
 
 
 # ---------------------------------------------------------------------------
 # Tab 3 -- Campaign Brief
 # ---------------------------------------------------------------------------
 
-with tab3:
+@st.fragment
+def _brief_tab():
     st.header("Campaign Brief")
     results = st.session_state.get("workflow_results", {})
     brief = results.get("campaign_brief")
@@ -714,62 +989,122 @@ with tab3:
                 if st.button("Confirm", key="confirm_rerun_brief_yes") and check_rate_limit("rerun_brief"):
                     st.session_state[confirm_key] = False
                     with st.spinner("Re-creating campaign brief..."):
-                        from core.graph import campaign_node
-                        result = campaign_node(results)
-                        st.session_state["workflow_results"].update(result)
+                        graph = _graph()
+                        result = graph.campaign_node(results)
+                        apply_update(st.session_state["workflow_results"], result)
                         st.rerun()
             with c2:
-                if st.button("Cancel", key="confirm_rerun_brief_no"):
-                    st.session_state[confirm_key] = False
-                    st.rerun()
+                st.button("Cancel", key="confirm_rerun_brief_no", on_click=_set_state, kwargs={confirm_key: False})
         else:
-            if st.button("Re-run Campaign Brief", key="rerun_brief"):
-                st.session_state[confirm_key] = True
-                st.rerun()
+            st.button("Re-run Campaign Brief", key="rerun_brief", on_click=_set_state, kwargs={confirm_key: True})
 
     if brief:
-        brief_text = ""
-        if isinstance(brief, dict):
-            lines = []
-            for k, v in brief.items():
-                display_key = k.replace("_", " ").title()
-                val_str = ", ".join(v) if isinstance(v, list) else str(v)
-                lines.append(f"**{display_key}**: {val_str}")
-            brief_text = "\n\n".join(lines)
-        else:
-            brief_text = str(brief)
+        brief_text = _format_brief(brief)
 
         st.subheader("Campaign Brief Details")
 
         if st.session_state["edit_brief"]:
-            updated_brief = st.text_area(
+            st.text_area(
                 "Edit Brief Content", value=brief_text, height=500, key="brief_editor"
             )
             col_save, col_cancel = st.columns([1, 4])
             with col_save:
-                if st.button("Save Brief", key="save_brief"):
-                    st.session_state["workflow_results"]["campaign_brief"] = updated_brief
-                    st.session_state["edit_brief"] = False
-                    st.rerun()
+                st.button(
+                    "Save Brief", key="save_brief", on_click=_save_edit,
+                    args=("campaign_brief", "brief_editor", "edit_brief"),
+                )
             with col_cancel:
-                if st.button("Cancel", key="cancel_brief"):
-                    st.session_state["edit_brief"] = False
-                    st.rerun()
+                st.button("Cancel", key="cancel_brief", on_click=_set_state, kwargs={"edit_brief": False})
         else:
             safe_markdown(brief_text)
             st.caption("Review the brief above. Click edit to make changes.")
-            if st.button("Edit Brief", key="edit_brief_btn"):
-                st.session_state["edit_brief"] = True
-                st.rerun()
+            st.button("Edit Brief", key="edit_brief_btn", on_click=_set_state, kwargs={"edit_brief": True})
     else:
         st.info("Run Research first to generate a campaign brief.")
 
 
+with tab3:
+    _brief_tab()
+
+
+_MANIFEST_COLUMNS = ["generate", "persona_role", "jtbd", "burning_question", "recommended_asset_type"]
+_MANIFEST_COLUMN_CONFIG = {
+    "generate": st.column_config.CheckboxColumn("Gen", default=True, width="small"),
+    "persona_role": st.column_config.TextColumn("Persona Role", required=True),
+    "jtbd": st.column_config.TextColumn("Job to be Done", required=True),
+    "burning_question": st.column_config.TextColumn("Key Question"),
+    "recommended_asset_type": st.column_config.SelectboxColumn(
+        "Asset Type", options=ASSET_TYPE_OPTIONS, default="Blog Post", required=True
+    ),
+}
+
+
+def _asset_type(item):
+    """The manifest row's asset type mapped onto ASSET_TYPE_OPTIONS."""
+    raw_type = str(item.get("recommended_asset_type", item.get("asset_type", "Blog Post")))
+    if raw_type in _TYPE_INDEX:
+        return raw_type
+    lower = raw_type.lower()
+    return next(
+        (canonical for keyword, canonical in _ASSET_TYPE_KEYWORDS if keyword in lower),
+        "Blog Post",
+    )
+
+
+def _manifest_frame(manifest, selections):
+    """
+    The content plan as one column per field for st.data_editor; `_row` (not shown)
+    is each row's manifest index so edits can be matched back to the full item.
+    """
+    return pd.DataFrame({
+        "_row": range(len(manifest)),
+        "generate": [i in selections for i in range(len(manifest))],
+        # Roles repeat across rows (one per asset for the same buyer)
+        "persona_role": [sys.intern(str(item.get("persona_role", ""))) for item in manifest],
+        "jtbd": [item.get("jtbd", "") for item in manifest],
+        "burning_question": [item.get("burning_question", "") for item in manifest],
+        "recommended_asset_type": [_asset_type(item) for item in manifest],
+    })
+
+
+def _edited_plan(manifest, edited):
+    """(manifest, selected indices) from the editor's rows; added rows missing a persona or JTBD are skipped."""
+    plan, selected = [], set()
+    # Cells left empty in added rows come back as NaN/None; treat both as missing
+    edited = edited.astype(object).where(edited.notna(), None)
+    for row in edited.to_dict("records"):
+        if not row.get("persona_role") or not row.get("jtbd"):
+            continue
+        item = dict(manifest[int(row["_row"])]) if row.get("_row") is not None else {}
+        asset_type = row.get("recommended_asset_type") or "Blog Post"
+        item.update(
+            persona_role=row["persona_role"],
+            jtbd=row["jtbd"],
+            burning_question=row.get("burning_question") or "",
+            recommended_asset_type=asset_type,
+            asset_type=asset_type,
+        )
+        if row.get("generate") is not False:
+            selected.add(len(plan))
+        plan.append(item)
+    return plan, selected
+
+
+def _select_manifest(select):
+    """on_click callback: keeps the editor's pending edits and selects every row (or none)."""
+    plan = st.session_state.get("_manifest_plan", st.session_state["workflow_results"]["content_manifest"])
+    st.session_state["workflow_results"]["content_manifest"] = plan
+    st.session_state["manifest_selections"] = set(range(len(plan))) if select else set()
+    st.session_state["_confirm_deselect_all"] = False
+    st.session_state.pop("manifest_editor", None)
+
+
 # ---------------------------------------------------------------------------
 # Tab 4 -- Content Assets
 # ---------------------------------------------------------------------------
 
-with tab4:
+@st.fragment
+def _assets_tab():
     st.header("Content & JTBD Manifest")
     results = st.session_state.get("workflow_results", {})
     manifest = results.get("content_manifest", [])
@@ -779,131 +1114,41 @@ with tab4:
         st.subheader("Content Plan")
         st.info("Select assets to generate and customize the type for each.")
 
-        # Asset type options
-        type_options = [
-            "Blog Post",
-            "LinkedIn Post",
-            "Email Sequence",
-            "Whitepaper",
-            "Case Study",
-            "Webinar Script",
-            "Landing Page",
-        ]
-
-        # Initialize selection state
-        if "manifest_selections" not in st.session_state:
-            st.session_state["manifest_selections"] = {i: True for i in range(len(manifest))}
+        # Initialize selection state: indices of the manifest rows to generate
+        st.session_state.setdefault("manifest_selections", set(range(len(manifest))))
 
         # Bulk buttons
         col_all, col_none, col_count, _ = st.columns([1, 1, 2, 3])
         with col_all:
-            if st.button("Select All", key="select_all"):
-                st.session_state["manifest_selections"] = {i: True for i in range(len(manifest))}
-                st.rerun()
+            st.button("Select All", key="select_all", on_click=_select_manifest, args=(True,))
         with col_none:
             confirm_key = "_confirm_deselect_all"
             if st.session_state.get(confirm_key):
-                if st.button("Confirm Deselect", key="confirm_deselect_yes"):
-                    st.session_state[confirm_key] = False
-                    st.session_state["manifest_selections"] = {i: False for i in range(len(manifest))}
-                    st.rerun()
+                st.button("Confirm Deselect", key="confirm_deselect_yes", on_click=_select_manifest, args=(False,))
             else:
-                if st.button("Deselect All", key="deselect_all"):
-                    st.session_state[confirm_key] = True
-                    st.rerun()
-        with col_count:
-            selected_count = sum(1 for v in st.session_state["manifest_selections"].values() if v)
-            st.write(f"**{selected_count} of {len(manifest)} selected**")
-
-        # Card-based manifest editor
-        for i, item in enumerate(manifest):
-            # Normalize asset type
-            raw_type = str(
-                item.get("recommended_asset_type", item.get("asset_type", "Blog Post"))
-            )
-            if raw_type not in type_options:
-                if "whitepaper" in raw_type.lower():
-                    raw_type = "Whitepaper"
-                elif "linkedin" in raw_type.lower():
-                    raw_type = "LinkedIn Post"
-                elif "email" in raw_type.lower():
-                    raw_type = "Email Sequence"
-                elif "blog" in raw_type.lower():
-                    raw_type = "Blog Post"
-                elif "webinar" in raw_type.lower():
-                    raw_type = "Webinar Script"
-                elif "case" in raw_type.lower():
-                    raw_type = "Case Study"
-                elif "landing" in raw_type.lower():
-                    raw_type = "Landing Page"
-                else:
-                    raw_type = "Blog Post"
-
-            with st.container(border=True):
-                col_check, col_persona, col_type = st.columns([0.5, 3, 2])
+                st.button("Deselect All", key="deselect_all", on_click=_set_state, kwargs={confirm_key: True})
+
+        # One editable table for the whole plan; rows can be added (custom assets) or deleted
+        edited = st.data_editor(
+            _manifest_frame(manifest, st.session_state["manifest_selections"]),
+            column_config=_MANIFEST_COLUMN_CONFIG,
+            column_order=_MANIFEST_COLUMNS,
+            num_rows="dynamic",
+            hide_index=True,
+            key="manifest_editor",
+        )
+        plan, selections = _edited_plan(manifest, edited)
+        st.session_state["_manifest_plan"] = plan
 
-                with col_check:
-                    selected = st.checkbox(
-                        "Gen",
-                        value=st.session_state["manifest_selections"].get(i, True),
-                        key=f"sel_{i}",
-                        label_visibility="collapsed",
-                    )
-                    st.session_state["manifest_selections"][i] = selected
-
-                with col_persona:
-                    st.markdown(f"**{item.get('persona_role', 'Unknown')}**")
-                    st.caption(item.get("jtbd", ""))
-
-                with col_type:
-                    new_type = st.selectbox(
-                        "Asset Type",
-                        options=type_options,
-                        index=type_options.index(raw_type) if raw_type in type_options else 0,
-                        key=f"type_{i}",
-                        label_visibility="collapsed",
-                    )
-                    # Update manifest with user selection
-                    manifest[i]["recommended_asset_type"] = new_type
-                    manifest[i]["asset_type"] = new_type
-
-                # Show burning question
-                if item.get("burning_question"):
-                    st.caption(f"Key Question: {item['burning_question']}")
-
-        # Update manifest in session state
-        st.session_state["workflow_results"]["content_manifest"] = manifest
-
-        # Add custom asset
-        with st.expander("Add Custom Asset"):
-            custom_persona = st.text_input("Persona Role", key="custom_persona")
-            custom_jtbd = st.text_input("Job to be Done", key="custom_jtbd")
-            custom_question = st.text_input("Key Question", key="custom_question")
-            custom_type = st.selectbox("Asset Type", type_options, key="custom_type")
-            if st.button("Add to Plan", key="add_custom"):
-                if custom_persona and custom_jtbd:
-                    new_item = {
-                        "persona_role": custom_persona,
-                        "jtbd": custom_jtbd,
-                        "burning_question": custom_question,
-                        "recommended_asset_type": custom_type,
-                        "asset_type": custom_type,
-                    }
-                    st.session_state["workflow_results"]["content_manifest"].append(new_item)
-                    st.session_state["manifest_selections"][len(manifest)] = True
-                    st.success("Asset added!")
-                    st.rerun()
-                else:
-                    st.warning("Persona and JTBD are required.")
+        with col_count:
+            st.write(f"**{len(selections)} of {len(plan)} selected**")
 
         # Generate button
         if st.button("Generate Selected Assets", type="primary", key="generate_assets") and check_rate_limit("generate"):
-            # Build approved list
-            approved_data = []
-            current_manifest = st.session_state["workflow_results"].get("content_manifest", [])
-            for i, item in enumerate(current_manifest):
-                if st.session_state["manifest_selections"].get(i, False):
-                    approved_data.append(item)
+            # Keep the edited plan, then build the approved list from it
+            st.session_state["workflow_results"]["content_manifest"] = plan
+            st.session_state["manifest_selections"] = selections
+            approved_data = [plan[i] for i in sorted(selections)]
 
             if not approved_data:
                 st.warning("No assets selected!")
@@ -912,13 +1157,7 @@ with tab4:
                     f"Generating {len(approved_data)} assets...", expanded=True
                 ) as gen_status:
                     try:
-                        from core.graph import (
-                            content_node,
-                            promo_node,
-                            review_node,
-                            should_refine,
-                            increment_refinement,
-                        )
+                        graph = _graph()
 
                         gen_state = {
                             "content_manifest": approved_data,
@@ -936,30 +1175,24 @@ with tab4:
                             "errors": [],
                         }
 
+                        # One generation-graph run covers every refinement round; its
+                        # node updates are streamed back to report progress
                         st.write(f"Creating {len(approved_data)} content assets...")
-                        result = content_node(gen_state)
-                        gen_state.update(result)
-
-                        st.write("Generating promotional materials...")
-                        result = promo_node(gen_state)
-                        gen_state.update(result)
-
-                        st.write("Running quality review...")
-                        result = review_node(gen_state)
-                        gen_state.update(result)
-
-                        # Refinement loop
-                        while should_refine(gen_state) == "refine":
-                            gen_state.update(increment_refinement(gen_state))
-                            count = gen_state.get("refinement_count", 0)
-                            st.write(f"Refining content (round {count})...")
-                            result = content_node(gen_state)
-                            gen_state.update(result)
-                            result = promo_node(gen_state)
-                            gen_state.update(result)
-                            st.write(f"Re-reviewing (round {count})...")
-                            result = review_node(gen_state)
-                            gen_state.update(result)
+                        for update in graph.generation_graph.stream(
+                            gen_state,
+                            config={"recursion_limit": 4 * (max_refinements + 1) + 5},
+                            stream_mode="updates",
+                        ):
+                            for node, result in update.items():
+                                apply_update(gen_state, result or {})
+                                if node == "content_creation":
+                                    st.write("Generating promotional materials...")
+                                elif node == "promotion":
+                                    st.write("Running quality review...")
+                                elif node == "review":
+                                    st.write(f"Review score: {gen_state.get('reviewer_score', 0)}/100")
+                                elif node == "increment_count":
+                                    st.write(f"Refining content (round {gen_state.get('refinement_count', 0)})...")
 
                         # Merge results
                         st.session_state["workflow_results"]["generated_assets"] = gen_state.get(
@@ -1005,33 +1238,26 @@ with tab4:
             with c1:
                 do_regen = st.button("Confirm", key="confirm_regen_plan_yes")
             with c2:
-                if st.button("Cancel", key="confirm_regen_plan_no"):
-                    st.session_state[confirm_key] = False
-                    st.rerun()
+                st.button("Cancel", key="confirm_regen_plan_no", on_click=_set_state, kwargs={confirm_key: False})
         else:
             do_regen = False
-            if st.button("Regenerate Content Plan", key="regen_plan"):
-                st.session_state[confirm_key] = True
-                st.rerun()
+            st.button("Regenerate Content Plan", key="regen_plan", on_click=_set_state, kwargs={confirm_key: True})
         if st.session_state.get(confirm_key) and do_regen and check_rate_limit("regen_plan"):
             st.session_state[confirm_key] = False
             with st.spinner("Re-planning content mix..."):
                 try:
-                    from core.graph import jtbd_node
+                    graph = _graph()
 
                     current_state = {
                         "campaign_brief": results.get("campaign_brief"),
                         "personas": results.get("personas"),
                         "strategy_framework": results.get("strategy_framework"),
                     }
-                    new_manifest = jtbd_node(current_state)
+                    new_manifest = graph.jtbd_node(current_state)
                     st.session_state["workflow_results"]["content_manifest"] = new_manifest.get(
                         "content_manifest", []
                     )
-                    st.session_state["manifest_selections"] = {
-                        i: True
-                        for i in range(len(new_manifest.get("content_manifest", [])))
-                    }
+                    _reset_manifest_selection()
                     st.success("Content plan updated!")
                     st.rerun()
                 except Exception as e:
@@ -1048,20 +1274,22 @@ with tab4:
         )
 
         if export_format == "Word (DOCX)":
-            if st.button("Generate DOCX Report", key="gen_docx"):
+            # With deferred downloads the report is only built when Download is clicked
+            if _DEFERRED_DOWNLOADS or st.button("Generate DOCX Report", key="gen_docx"):
                 with st.spinner("Compiling report..."):
                     try:
-                        from utils.docx_generator import generate_campaign_docx_bytes
-
                         company_name = results.get("company_name", "Campaign")
-                        company_slug = re.sub(r"[^a-zA-Z0-9_]", "_", company_name)
+                        company_slug = _SLUG_RE.sub("_", company_name)
                         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                         docx_filename = f"{company_slug}_Strategy_{timestamp}.docx"
 
-                        buf = generate_campaign_docx_bytes(results)
                         st.download_button(
                             label="Download DOCX Report",
-                            data=buf,
+                            data=deferred_download(_memoized_export(
+                                "docx",
+                                {k: v for k, v in results.items() if k != "uploaded_file_bytes"},
+                                _docx_exporter(results),
+                            )),
                             file_name=docx_filename,
                             mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                             key="dl_docx",
@@ -1070,23 +1298,11 @@ with tab4:
                         st.error(f"Export error: {e}")
 
         elif export_format == "Markdown (ZIP)":
-            if st.button("Generate Markdown ZIP", key="gen_zip"):
-                zip_buffer = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                    for i, asset in enumerate(assets):
-                        title = re.sub(r"[^a-zA-Z0-9_]", "_", asset.get("title", f"asset_{i}"))
-                        content = asset.get("content", "")
-                        promo = asset.get("promotional_materials", "")
-                        full_content = content
-                        if promo:
-                            full_content += f"\n\n---\n\n## Promotional Materials\n\n{promo}"
-                        zf.writestr(f"{title}.md", full_content)
-
-                zip_buffer.seek(0)
+            if _DEFERRED_DOWNLOADS or st.button("Generate Markdown ZIP", key="gen_zip"):
                 st.download_button(
                     label="Download Markdown ZIP",
-                    data=zip_buffer,
-                    file_name=f"campaign_assets_{datetime.now().strftime('%Y%m%d')}.zip",
+                    data=deferred_download(_memoized_export("zip", assets, _zip_exporter(assets))),
+                    file_name=f"campaign_assets_{_today_stamp()}.zip",
                     mime="application/zip",
                     key="dl_zip",
                 )
@@ -1115,7 +1331,7 @@ with tab4:
 
                 if st.session_state[edit_key]:
                     # Edit mode
-                    updated_content = st.text_area(
+                    st.text_area(
                         "Edit Content",
                         value=asset.get("content", ""),
                         height=400,
@@ -1123,16 +1339,12 @@ with tab4:
                     )
                     col_s, col_c = st.columns([1, 4])
                     with col_s:
-                        if st.button("Save", key=f"save_{asset_id}"):
-                            st.session_state["workflow_results"]["generated_assets"][i][
-                                "content"
-                            ] = updated_content
-                            st.session_state[edit_key] = False
-                            st.rerun()
+                        st.button(
+                            "Save", key=f"save_{asset_id}", on_click=_save_asset,
+                            args=(i, f"editor_{asset_id}", edit_key),
+                        )
                     with col_c:
-                        if st.button("Cancel", key=f"cancel_{asset_id}"):
-                            st.session_state[edit_key] = False
-                            st.rerun()
+                        st.button("Cancel", key=f"cancel_{asset_id}", on_click=_set_state, kwargs={edit_key: False})
                 else:
                     # Side-by-side view
                     col_content, col_promo = st.columns(2)
@@ -1143,9 +1355,7 @@ with tab4:
 
                         col_edit, col_dl = st.columns(2)
                         with col_edit:
-                            if st.button("Edit", key=f"edit_btn_{asset_id}"):
-                                st.session_state[edit_key] = True
-                                st.rerun()
+                            st.button("Edit", key=f"edit_btn_{asset_id}", on_click=_set_state, kwargs={edit_key: True})
                         with col_dl:
                             st.download_button(
                                 label="Download MD",
@@ -1162,3 +1372,7 @@ with tab4:
                                 "promotional_materials", "No promotional materials generated."
                             )
                         )
+
+
+with tab4:
+    _assets_tab()
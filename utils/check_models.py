@@ -2,8 +2,9 @@ import os
 import google.generativeai as genai
 from dotenv import load_dotenv, find_dotenv
 
-# Load env safely
-load_dotenv(find_dotenv(), override=True)
+# Load env (skips the upward .env search when the key is already exported)
+if not (os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")):
+    load_dotenv(find_dotenv(), override=False)
 
 api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
 
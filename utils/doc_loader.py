@@ -1,9 +1,53 @@
 import os
 import io
+import multiprocessing
 import tempfile
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Tuple, Union
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredWordDocumentLoader
 
+# Loader per supported (lower-cased) extension
+_LOADERS = {
+    ".pdf": PyPDFLoader,
+    ".docx": UnstructuredWordDocumentLoader,
+    ".doc": UnstructuredWordDocumentLoader,
+    ".txt": TextLoader,
+    ".md": TextLoader,
+}
+# CPU-bound formats, parsed in a process pool when there are several and together they
+# are large enough to outweigh starting the workers (~1s)
+_PARSED_EXTENSIONS = {".pdf", ".docx", ".doc"}
+_POOL_MIN_BYTES = 1024 * 1024
+_MAX_LOAD_WORKERS = 8
+
+
+def _load_one(filepath: str) -> Tuple[str, str]:
+    """
+    (content, error message) for one supported file. Module-level so the process pool
+    can pickle it; errors are returned rather than raised so one bad file is reported
+    on its own.
+    """
+    try:
+        docs = _LOADERS[os.path.splitext(filepath)[1].lower()](filepath).load()
+        return "\n\n".join([d.page_content for d in docs]), ""
+    except Exception as e:
+        return "", str(e)
+
+
+def _load_many(filepaths: List[str]) -> List[Tuple[str, str]]:
+    """_load_one for each path, in order; spread over processes when 2+ large files need parsing."""
+    parsed = [path for path in filepaths if os.path.splitext(path)[1].lower() in _PARSED_EXTENSIONS]
+    if len(parsed) > 1 and sum(os.path.getsize(path) for path in parsed) >= _POOL_MIN_BYTES:
+        workers = min(_MAX_LOAD_WORKERS, os.cpu_count() or 1, len(filepaths))
+        try:
+            # spawn: forking the (multi-threaded) Streamlit server is not safe
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                return list(pool.map(_load_one, filepaths))
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Document process pool unavailable, loading serially: {e}")
+    return [_load_one(path) for path in filepaths]
+
 
 class DocumentLoader:
     def __init__(self, directory: str = ""):
@@ -17,68 +61,61 @@ class DocumentLoader:
         if not os.path.exists(self.directory):
             return ["Directory not found."]
 
-        for filename in os.listdir(self.directory):
-            filepath = os.path.join(self.directory, filename)
-            content = ""
-
-            try:
-                if filename.endswith(".pdf"):
-                    loader = PyPDFLoader(filepath)
-                    pages = loader.load()
-                    content = "\n\n".join([p.page_content for p in pages])
-                elif filename.endswith(".docx") or filename.endswith(".doc"):
-                    loader = UnstructuredWordDocumentLoader(filepath)
-                    docs = loader.load()
-                    content = "\n\n".join([d.page_content for d in docs])
-                elif filename.endswith(".txt") or filename.endswith(".md"):
-                    loader = TextLoader(filepath)
-                    docs = loader.load()
-                    content = docs[0].page_content
-                else:
-                    continue
+        # DirEntry carries the name, path and file type without extra stat calls
+        with os.scandir(self.directory) as entries:
+            files = [
+                (entry.name, entry.path)
+                for entry in entries
+                if os.path.splitext(entry.name)[1].lower() in _LOADERS and entry.is_file()
+            ]
 
-                if content:
-                    contents.append(f"--- File: {filename} ---\n{content}\n")
-            except Exception as e:
-                contents.append(f"--- Error loading {filename}: {str(e)} ---\n")
+        for (filename, _), (content, error) in zip(files, _load_many([path for _, path in files])):
+            if error:
+                contents.append(f"--- Error loading {filename}: {error} ---\n")
+            elif content:
+                contents.append(f"--- File: {filename} ---\n{content}\n")
 
         return contents
 
     @staticmethod
-    def load_from_bytes(files: List[Tuple[str, bytes]]) -> List[str]:
+    def load_from_bytes(files: List[Tuple[str, Union[bytes, memoryview]]]) -> List[str]:
         """
         Accepts a list of (filename, bytes_content) tuples and returns list of content strings.
-        Useful for cloud/Streamlit uploads where files are in-memory.
+        Useful for cloud/Streamlit uploads where files are in-memory; content may be a
+        memoryview over the upload buffer, which is read without copying it to bytes.
         """
-        contents = []
-        for filename, file_bytes in files:
-            try:
-                if filename.endswith(".txt") or filename.endswith(".md"):
-                    content = file_bytes.decode("utf-8", errors="replace")
-                elif filename.endswith(".pdf") or filename.endswith(".docx") or filename.endswith(".doc"):
-                    # Write to temp file for loaders that require file paths
-                    suffix = os.path.splitext(filename)[1]
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                        tmp.write(file_bytes)
-                        tmp_path = tmp.name
-                    try:
-                        if filename.endswith(".pdf"):
-                            loader = PyPDFLoader(tmp_path)
-                            pages = loader.load()
-                            content = "\n\n".join([p.page_content for p in pages])
-                        else:
-                            loader = UnstructuredWordDocumentLoader(tmp_path)
-                            docs = loader.load()
-                            content = "\n\n".join([d.page_content for d in docs])
-                    finally:
-                        os.unlink(tmp_path)
-                else:
+        # Text is decoded in place; other formats are staged to temp files for path-based loaders
+        results = {}
+        staged = []
+        try:
+            for n, (filename, file_bytes) in enumerate(files):
+                ext = os.path.splitext(filename)[1].lower()
+                if ext not in _LOADERS:
+                    continue
+                if ext in (".txt", ".md"):
+                    results[n] = (str(file_bytes, "utf-8", errors="replace"), "")
                     continue
+                try:
+                    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
+                        tmp.write(file_bytes)
+                    staged.append((n, tmp.name))
+                except Exception as e:
+                    results[n] = ("", str(e))
+
+            for (n, _), result in zip(staged, _load_many([path for _, path in staged])):
+                results[n] = result
+        finally:
+            for _, path in staged:
+                os.unlink(path)
 
-                if content:
-                    contents.append(f"--- File: {filename} ---\n{content}\n")
-            except Exception as e:
-                contents.append(f"--- Error loading {filename}: {str(e)} ---\n")
+        contents = []
+        for n in sorted(results):
+            filename = files[n][0]
+            content, error = results[n]
+            if error:
+                contents.append(f"--- Error loading {filename}: {error} ---\n")
+            elif content:
+                contents.append(f"--- File: {filename} ---\n{content}\n")
         return contents
 
 
@@ -6,7 +6,10 @@ Style: Integrated Marketing Campaign Strategy & Assets
 
 import os
 import io
+import zipfile
 from docx import Document
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.pkgwriter import _ContentTypesItem
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
@@ -18,6 +21,15 @@ ACCENT_CYAN = RGBColor(0x0E, 0xA5, 0xE9)   # #0EA5E9
 DARK_BG = RGBColor(0x07, 0x0B, 0x14)       # #070B14
 MUTED_TEXT = RGBColor(0x8B, 0x99, 0xAD)    # #8B99AD
 
+# zlib's default level, which python-docx's own save uses
+DEFAULT_ZIP_LEVEL = 6
+
+# Inline markdown markers handled by markdown_to_docx
+_MD_BOLD = re.compile(r'(\*\*.*?\*\*)')
+_MD_ITALIC = re.compile(r'(\*.*?\*)')
+# Paragraph style by two-character line prefix in add_formatted_section
+_LINE_STYLES = {'- ': 'List Bullet', '* ': 'List Bullet'}
+
 def setup_branding(doc: Document):
     """Register styles for Bhavsar Growth Consulting."""
     style = doc.styles['Normal']
@@ -67,7 +79,15 @@ def add_cover_page(doc: Document, company_name: str):
 def markdown_to_docx(paragraph, text: str):
     """Parse simple markdown (bold, italic, links) and append to docx paragraph."""
     # This is a simplified version of the logic in the audit tool
-    parts = re.split(r'(\*\*.*?\*\*)', str(text))
+    text = str(text)
+    if '*' not in text:
+        # Plain line (most of them): one run, no regex scans
+        if text:
+            run = paragraph.add_run(text)
+            run.bold = False
+            run.italic = False
+        return
+    parts = _MD_BOLD.split(text)
     for part in parts:
         is_bold = False
         if part.startswith('**') and part.endswith('**'):
@@ -76,7 +96,8 @@ def markdown_to_docx(paragraph, text: str):
         else:
             content = part
             
-        sub_parts = re.split(r'(\*.*?\*)', content)
+        # Italics can sit inside bold text, so bold parts are split again
+        sub_parts = _MD_ITALIC.split(content) if '*' in content else (content,)
         for sub_part in sub_parts:
             is_italic = False
             if sub_part.startswith('*') and sub_part.endswith('*'):
@@ -96,22 +117,21 @@ def add_formatted_section(doc, title, content, level=2):
     doc.add_heading(title, level=level)
     
     if isinstance(content, str):
-        lines = content.split('\n')
-        for line in lines:
+        for line in content.splitlines():
             line = line.strip()
             if not line: continue
-            
-            style = 'Normal'
-            if line.startswith('- ') or line.startswith('* '):
-                style = 'List Bullet'
-                line = line[2:]
-            elif line.startswith('### '):
+
+            # Dispatch on fixed-width prefixes (no line starting "- "/"* " can also be a heading)
+            if line[:4] == '### ':
                 doc.add_heading(line[4:], level=3)
                 continue
-            elif line.startswith('## '):
+            if line[:3] == '## ':
                 doc.add_heading(line[3:], level=2)
                 continue
-            
+            style = _LINE_STYLES.get(line[:2], 'Normal')
+            if style != 'Normal':
+                line = line[2:]
+
             p = doc.add_paragraph(style=style)
             markdown_to_docx(p, line)
     elif isinstance(content, dict):
@@ -156,7 +176,10 @@ def _build_campaign_doc(results: dict) -> Document:
     assets = results.get("generated_assets", [])
     if assets:
         doc.add_heading("Generated Content Library", level=1)
-        for asset in assets:
+        for idx, asset in enumerate(assets):
+            # Between assets only: a break after the last one just adds an empty page
+            if idx:
+                doc.add_page_break()
             doc.add_heading(f"{asset.get('type')}: {asset.get('title')}", level=2)
 
             # Content
@@ -167,22 +190,43 @@ def _build_campaign_doc(results: dict) -> Document:
             if promo:
                 add_formatted_section(doc, "Promotional Materials & Ad Copy", promo, level=3)
 
-            doc.add_page_break()
-
     return doc
 
 
-def generate_campaign_docx(results: dict, output_path: str):
+def _save_doc(doc: Document, target, level: int):
+    """
+    Save `doc`, deflating its parts at zlib `level` (1 = fastest, 9 = smallest). Mirrors
+    OpcPackage.save, but writes the parts through our own ZipFile since python-docx has
+    no compression option.
+    """
+    package = doc.part.package
+    parts = package.parts
+    for part in parts:
+        part.before_marshal()
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED, compresslevel=level) as zf:
+        zf.writestr(CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob)
+        zf.writestr(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+        for part in parts:
+            zf.writestr(part.partname.membername, part.blob)
+            if len(part.rels):
+                zf.writestr(part.partname.rels_uri.membername, part.rels.xml)
+
+
+def generate_campaign_docx(results: dict, output_path: str, level: int = DEFAULT_ZIP_LEVEL):
     """Main generation function for Campaign Strategy & Assets (file path output)."""
     doc = _build_campaign_doc(results)
-    doc.save(output_path)
+    _save_doc(doc, output_path, level)
     return output_path
 
 
-def generate_campaign_docx_bytes(results: dict) -> io.BytesIO:
-    """Generate campaign docx and return as BytesIO for cloud/streaming use."""
+def generate_campaign_docx_stream(results: dict, fileobj, level: int = DEFAULT_ZIP_LEVEL):
+    """Generate campaign docx into a writable, seekable file object and rewind it."""
     doc = _build_campaign_doc(results)
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    _save_doc(doc, fileobj, level)
+    fileobj.seek(0)
+    return fileobj
+
+
+def generate_campaign_docx_bytes(results: dict, level: int = DEFAULT_ZIP_LEVEL) -> io.BytesIO:
+    """Generate campaign docx and return as BytesIO for cloud/streaming use."""
+    return generate_campaign_docx_stream(results, io.BytesIO(), level)
@@ -1,13 +1,69 @@
 import socket
 import ipaddress
+import re
+import threading
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import html2text
 from urllib.parse import urlparse, urljoin
 
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = "lxml"
+except ImportError:  # optional: libxml2-backed parser, falls back to the pure-Python one
+    _HTML_PARSER = "html.parser"
+
 # Rate limiting: minimum seconds between requests to the same domain
 _REQUEST_DELAY = 1.0
+# Seconds a hostname's resolved addresses are reused by validate_url, and how many are kept
+_DNS_TTL = 60.0
+_DNS_CACHE_SIZE = 1024
+_dns_cache = {}
+_dns_lock = threading.Lock()
+
+# Paths worth following from the primary page
+_DEEP_LINK_KEYWORDS_RE = re.compile(r'about|feature|service|product|solution|platform', re.IGNORECASE)
+
+# Pages are read in chunks and abandoned past this size (or if they are not HTML)
+_MAX_PAGE_BYTES = 5 * 1024 * 1024
+_READ_CHUNK_BYTES = 64 * 1024
+_HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Prefix of the text scrape() returns when the primary page fails
+SCRAPE_ERROR_PREFIX = "Error during scrape: "
+
+# Deep links fetched per scrape (concurrently, over the session's kept-alive connections)
+_MAX_DEEP_LINKS = 3
+
+
+def _resolve(hostname: str) -> tuple:
+    """IP addresses for hostname, cached for _DNS_TTL seconds. Raises socket.gaierror."""
+    now = time.monotonic()
+    with _dns_lock:
+        cached = _dns_cache.get(hostname)
+    if cached and cached[0] > now:
+        return cached[1]
+    ips = tuple(sockaddr[0] for _, _, _, _, sockaddr in socket.getaddrinfo(hostname, None))
+    with _dns_lock:
+        if len(_dns_cache) >= _DNS_CACHE_SIZE:
+            _dns_cache.clear()
+        _dns_cache[hostname] = (now + _DNS_TTL, ips)
+    return ips
+
+
+def _converter() -> html2text.HTML2Text:
+    """
+    A fresh HTML-to-Markdown converter. HTML2Text keeps per-document state that leaks
+    into the next page it handles and is not thread-safe, while building one is ~5us.
+    """
+    converter = html2text.HTML2Text()
+    converter.ignore_links = False
+    converter.ignore_images = True
+    converter.ignore_tables = False
+    return converter
 
 
 def validate_url(url: str) -> None:
@@ -29,12 +85,12 @@ def validate_url(url: str) -> None:
 
     # Resolve hostname and check for private/reserved IPs
     try:
-        addrinfo = socket.getaddrinfo(hostname, None)
+        addresses = _resolve(hostname)
     except socket.gaierror:
         raise ValueError(f"Cannot resolve hostname: {hostname}")
 
-    for family, _, _, _, sockaddr in addrinfo:
-        ip = ipaddress.ip_address(sockaddr[0])
+    for address in addresses:
+        ip = ipaddress.ip_address(address)
         if ip.is_private or ip.is_reserved or ip.is_loopback or ip.is_link_local:
             raise ValueError(f"URL resolves to private/reserved IP address: {ip}")
 
@@ -44,11 +100,14 @@ class WebScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.converter = html2text.HTML2Text()
-        self.converter.ignore_links = False
-        self.converter.ignore_images = True
-        self.converter.ignore_tables = False
         self._last_request_time = 0.0
+        self._rate_lock = threading.Lock()
+        # One connection pool per host, so the deep links reuse the primary page's TCP/TLS connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
     def scrape(self, url: str, depth: int = 1) -> str:
         """
@@ -58,66 +117,96 @@ class WebScraper:
         print(f"Scraping primary URL: {url}...")
         try:
             # Fetch the primary page's raw HTML first
-            primary_html = self._fetch_raw_html(url)
-            primary_markdown = self._convert_html_to_markdown(primary_html)
+            primary_soup = self._parse(self._fetch_raw_html(url))
 
             if depth <= 0:
-                return primary_markdown
+                return self._convert_html_to_markdown(primary_soup)
 
-            # Find deep links from the primary page's HTML
-            deep_links = self._find_deep_links(url, primary_html)
+            # Find deep links before conversion strips the nav/footer they often live in
+            deep_links = self._find_deep_links(url, primary_soup)
             print(f"Found deep links: {deep_links}")
+            primary_markdown = self._convert_html_to_markdown(primary_soup)
             
             combined_content = f"# Primary Page Summary\n{primary_markdown}\n\n"
-            
-            for link in deep_links[:3]: # Limit to 3 for speed
-                validate_url(link)
-                print(f"Scraping deep link: {link}...")
-                page_html = self._fetch_raw_html(link)
-                page_markdown = self._convert_html_to_markdown(page_html)
-                combined_content += f"# Internal Page: {link}\n{page_markdown}\n\n"
-                
+
+            links = deep_links[:_MAX_DEEP_LINKS]
+            with ThreadPoolExecutor(max_workers=_MAX_DEEP_LINKS) as executor:
+                pages = list(executor.map(self._fetch_and_convert, links))
+            for link, page_markdown in zip(links, pages):
+                if page_markdown:
+                    combined_content += f"# Internal Page: {link}\n{page_markdown}\n\n"
+
             return combined_content
         except Exception as e:
-            return f"Error during scrape: {str(e)}"
+            return f"{SCRAPE_ERROR_PREFIX}{str(e)}"
+
+    def _fetch_and_convert(self, url: str) -> str:
+        """
+        Validates, fetches and converts one deep link to Markdown. A failing deep link
+        (not HTML, too large, HTTP error...) is logged and returns "", so only errors on
+        the primary page fail the scrape.
+        """
+        try:
+            validate_url(url)
+            print(f"Scraping deep link: {url}...")
+            return self._convert_html_to_markdown(self._parse(self._fetch_raw_html(url)))
+        except Exception as e:
+            print(f"Skipping deep link {url}: {e}")
+            return ""
 
     def _fetch_raw_html(self, url: str) -> str:
         """Fetches the raw HTML content of a URL with rate limiting."""
-        elapsed = time.time() - self._last_request_time
-        if elapsed < _REQUEST_DELAY:
-            time.sleep(_REQUEST_DELAY - elapsed)
-        self._last_request_time = time.time()
-        response = requests.get(url, headers=self.headers, timeout=10)
-        response.raise_for_status()
-        return response.text
-
-    def _convert_html_to_markdown(self, html_content: str) -> str:
-        """Converts HTML content to Markdown, cleaning it first."""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Reserve the next start slot: requests start _REQUEST_DELAY apart but may overlap in flight
+        with self._rate_lock:
+            now = time.time()
+            start = max(now, self._last_request_time + _REQUEST_DELAY)
+            self._last_request_time = start
+        if start > now:
+            time.sleep(start - now)
+        with self.session.get(url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            if not content_type.lower().startswith(_HTML_CONTENT_TYPES):
+                raise ValueError(f"Not an HTML page ({content_type or 'no Content-Type'}): {url}")
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=_READ_CHUNK_BYTES):
+                body += chunk
+                if len(body) > _MAX_PAGE_BYTES:
+                    raise ValueError(f"Page exceeds {_MAX_PAGE_BYTES // (1024 * 1024)} MB: {url}")
+            # Without a declared charset requests assumes ISO-8859-1 for text/*; UTF-8 is the likelier guess
+            encoding = (response.encoding if "charset" in content_type.lower() else None) or "utf-8"
+            try:
+                return body.decode(encoding, errors="replace")
+            except LookupError:  # charset Python does not know
+                return body.decode("utf-8", errors="replace")
+
+    def _parse(self, html_content: str) -> BeautifulSoup:
+        """Parses a page once; the soup is shared by link discovery and conversion."""
+        return BeautifulSoup(html_content, _HTML_PARSER)
+
+    def _convert_html_to_markdown(self, soup: BeautifulSoup) -> str:
+        """Converts a parsed page to Markdown, cleaning it first (modifies `soup`)."""
         # Remove script and style elements, and navigation/footer
         for script in soup(["script", "style", "nav", "footer"]):
             script.decompose()
-        return self.converter.handle(str(soup))
+        return _converter().handle(soup.decode())
 
-    def _find_deep_links(self, base_url: str, html_content: str) -> list:
-        """Simple heuristic to find high-value internal links."""
-        validate_url(base_url)
-        soup = BeautifulSoup(html_content, 'html.parser')
-        links = []
+    def _find_deep_links(self, base_url: str, soup: BeautifulSoup) -> list:
+        """Simple heuristic to find high-value internal links. `base_url` must already be validated."""
+        links = {}  # insertion-ordered set
         domain = urlparse(base_url).netloc
-        keywords = ['about', 'feature', 'service', 'product', 'solution', 'platform']
-        
+
         for a in soup.find_all('a', href=True):
             href = a['href']
-            # Normalize
+            # Prioritize keywords, checked on the raw href before paying to resolve it
+            if not _DEEP_LINK_KEYWORDS_RE.search(href):
+                continue
+            # Normalize, then filter internal only
             full_url = urljoin(base_url, href)
-            # Filter internal only
-            if urlparse(full_url).netloc == domain:
-                # Prioritize keywords
-                if any(k in full_url.lower() for k in keywords):
-                    if full_url not in links and full_url != base_url:
-                        links.append(full_url)
-        return list(set(links))
+            if full_url != base_url and urlparse(full_url).netloc == domain:
+                links[full_url] = None
+        # Page order, so the deep links fetched are the first ones the page links to
+        return list(links)
 
 if __name__ == "__main__":
     # Test
@@ -1,10 +1,11 @@
+import asyncio
 import os
-import time
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv, find_dotenv
 
-# Load env
-load_dotenv(find_dotenv(), override=True)
+# Load env (skips the upward .env search when the key is already exported)
+if not (os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")):
+    load_dotenv(find_dotenv(), override=False)
 
 api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
 if not api_key:
@@ -23,20 +24,36 @@ candidates = [
 
 print(f"API key: {'configured' if api_key else 'MISSING'}")
 
-for model in candidates:
-    print(f"\n--- Testing {model} ---")
+async def probe(model):
+    """Sends one short prompt to `model`; raises on failure."""
+    llm = ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=api_key,
+        max_retries=0 # Fail fast for this test
+    )
+    return await llm.ainvoke("Say 'Hello' if you can hear me.")
+
+
+async def main():
+    # Probe every candidate at once, but recommend in priority order: wait on them
+    # in list order and stop at the first success, cancelling the rest.
+    tasks = [asyncio.create_task(probe(model)) for model in candidates]
     try:
-        llm = ChatGoogleGenerativeAI(
-            model=model,
-            google_api_key=api_key,
-            max_retries=0 # Fail fast for this test
-        )
-        response = llm.invoke("Say 'Hello' if you can hear me.")
-        print(f"SUCCESS! {model} responded: {response.content}")
-        # If we find one, maybe we should stop? Or check all?
-        # Let's stop at the first success to give the user a quick fix.
-        print(f"\n>>> RECOMMENDED MODEL: {model} <<<")
-        break
-    except Exception as e:
-        print(f"FAILED {model}: {e}")
-        time.sleep(1) # Brief pause
+        for model, task in zip(candidates, tasks):
+            print(f"\n--- Testing {model} ---")
+            try:
+                response = await task
+            except Exception as e:
+                print(f"FAILED {model}: {e}")
+                continue
+            print(f"SUCCESS! {model} responded: {response.content}")
+            # Stop at the first success to give the user a quick fix.
+            print(f"\n>>> RECOMMENDED MODEL: {model} <<<")
+            break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+asyncio.run(main())
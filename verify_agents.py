@@ -1,8 +1,8 @@
 import os
 import json
-from dotenv import load_dotenv
+from core.env import load_env
 
-load_dotenv()
+load_env()
 
 from agents.campaign_agent import CampaignArchitectAgent
 from agents.jtbd_agent import JTBDAnalyst